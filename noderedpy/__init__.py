@@ -13,7 +13,7 @@ from .nodered.node.properties import (
     TypedInput
 )
 
-__version__ = "0.3.0"
+__version__ = "0.4.0"
 
 __all__ = [
     "RED", "REDBuilder", "Auth", "Node",
@@ -12,14 +12,15 @@ from .nodered.red.editor.widget import Widget
 from .nodered.route import Route
 
 
-def register(name:str, category:str = "nodered_py", version:str = "1.0.0", description:str = "", author:str = "nodered.py", keywords:List[str] = [], icon:str = "function.png", color:str = "#FDD0A2", widgets:List[Widget] = []) -> MethodType:
+def register(name:str, category:str = "nodered_py", version:str = "1.0.0", description:str = "", author:str = "nodered.py", keywords:List[str] = [], icon:str = "function.png", color:str = "#FDD0A2", widgets:List[Widget] = [], concurrency:int = None, executor:Literal["thread", "process"] = "thread", batch_size:int = None, max_batch_wait_ms:float = 5) -> MethodType:
     """
     Decorator to register Node function
+    (`async def` function runs on event loop of RED)
 
     Parameters
     ----------
     name: str, required
-        name of Node to register
+        name of Node to register(must be unique)
     category: str, default nodered_py
         category of Node
     version: str, default 1.0.0
@@ -34,14 +35,28 @@ def register(name:str, category:str = "nodered_py", version:str = "1.0.0", descr
         icon of Node(html)
     widgets: List[Widget]
         list of widgets to display in editor dialog
+    concurrency: int, default None
+        number of workers only for this Node
+        if None, use shared workers of RED(or cpu count for "process" executor, 1024 for `async def`)
+    executor: str, default thread
+        where Node function runs(`async def` function always runs on event loop of RED)
+        options: thread, process
+        "process" runs in worker processes started with RED, for cpu-bound functions
+        (function must be defined at module level, and main script must start RED under `if __name__ == "__main__":`)
+    batch_size: int, default None
+        if set, Node function is called with ( node, list of ( props, msg ) ) up to `batch_size` messages
+        and must return list of msg in same order
+    max_batch_wait_ms: float, default 5
+        max time(ms) to wait more messages after first message of batch
     """
     def decorator(node_func:MethodType):
-        RED.registered_nodes.append(
+        RED.registry.add_node(
             Node(
                 name, category,
                 version, description, author, keywords,
                 icon, color,
-                widgets, node_func
+                widgets, node_func, concurrency, executor,
+                batch_size, max_batch_wait_ms
             )
         )
 
@@ -52,6 +67,7 @@ def register(name:str, category:str = "nodered_py", version:str = "1.0.0", descr
 def route(url:str, method:Literal["get", "post"]) -> MethodType:
     """
     Decorator to register route to Node-RED
+    (`async def` function runs on event loop of RED)
 
     Parameters
     ----------
@@ -62,7 +78,7 @@ def route(url:str, method:Literal["get", "post"]) -> MethodType:
         options: get, post
     """
     def decorator(route_func:MethodType):
-        RED.registered_routes.append(
+        RED.registry.add_route(
             Route(url, method, route_func)
         )
 
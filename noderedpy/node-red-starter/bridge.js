@@ -0,0 +1,526 @@
+const net = require("net"),
+    fs = require("fs"), path = require("path");
+
+// interval(ms) to check output files in file mode
+const POLL_INTERVAL = 1;
+// interval(ms) to check control files in file mode
+const CONTROL_INTERVAL = 500;
+// delay(ms) to send again when python is busy, doubles until max
+const RETRY_DELAY = 10, MAX_RETRY_DELAY = 1000;
+// delay(ms) to connect again when socket closed, doubles until max
+const RECONNECT_DELAY = 10, MAX_RECONNECT_DELAY = 1000;
+
+// key of placeholder for binary section in json header
+const BUFFER_KEY = "__nrpy_buffer__";
+
+// replace Buffers in value with placeholders, Buffers are collected to buffers
+function extractBuffers(value, buffers) {
+    if (Buffer.isBuffer(value)) {
+        buffers.push(value);
+        return { [BUFFER_KEY]: buffers.length - 1 };
+    }
+    if (Array.isArray(value)) {
+        return value.map((item) => extractBuffers(item, buffers));
+    }
+    if (value != null && typeof(value) == "object" && typeof(value.toJSON) != "function") {
+        var replaced = {};
+        for (var key of Object.keys(value)) {
+            replaced[key] = extractBuffers(value[key], buffers);
+        }
+
+        return replaced;
+    }
+
+    return value;
+}
+
+// replace placeholders in value with Buffers, Uint8Array(bin of msgpack) becomes Buffer
+function restoreBuffers(value, buffers) {
+    if (value instanceof Uint8Array) {
+        return Buffer.isBuffer(value) ? value : Buffer.from(value.buffer, value.byteOffset, value.byteLength);
+    }
+    if (Array.isArray(value)) {
+        for (var idx = 0; idx < value.length; idx++) {
+            value[idx] = restoreBuffers(value[idx], buffers);
+        }
+    }
+    else if (value != null && typeof(value) == "object") {
+        if (value[BUFFER_KEY] != undefined && Object.keys(value).length == 1) {
+            return buffers[value[BUFFER_KEY]];
+        }
+
+        for (var key of Object.keys(value)) {
+            value[key] = restoreBuffers(value[key], buffers);
+        }
+    }
+
+    return value;
+}
+
+// serializers of header, json or msgpack(`@msgpack/msgpack`)
+const codecs = {
+    json: {
+        encode(value) {
+            return Buffer.from(JSON.stringify(value), "utf-8");
+        },
+        decode(header, buffers) {
+            if (buffers.length == 0) {
+                return JSON.parse(header.toString("utf-8"));
+            }
+
+            return JSON.parse(header.toString("utf-8"), (key, value) => {
+                if (value != null && typeof(value) == "object" && value[BUFFER_KEY] != undefined && Object.keys(value).length == 1) {
+                    return buffers[value[BUFFER_KEY]];
+                }
+
+                return value;
+            });
+        }
+    },
+    msgpack: {
+        encode(value) {
+            const packed = require("@msgpack/msgpack").encode(value);
+            return Buffer.from(packed.buffer, packed.byteOffset, packed.byteLength);
+        },
+        decode(header, buffers) {
+            return restoreBuffers(require("@msgpack/msgpack").decode(header), buffers);
+        }
+    }
+};
+
+// encode to parts of body, 4 bytes length + header, and 4 bytes length + raw bytes for each Buffer
+function encodeFrame(data, codec) {
+    const buffers = [];
+    const header = codecs[codec].encode(extractBuffers(data, buffers));
+
+    const parts = [ lengthOf(header.length), header ];
+    for (var buffer of buffers) {
+        parts.push(lengthOf(buffer.length), buffer);
+    }
+
+    return parts;
+}
+
+// decode body, binary sections become Buffer on body(no copy)
+function decodeFrame(body, codec) {
+    const headerLength = body.readUInt32BE(0);
+    const header = body.subarray(4, 4 + headerLength);
+
+    const buffers = [];
+    var offset = 4 + headerLength;
+    while (offset < body.length) {
+        const bufferLength = body.readUInt32BE(offset);
+        buffers.push(body.subarray(offset + 4, offset + 4 + bufferLength));
+        offset += 4 + bufferLength;
+    }
+
+    return codecs[codec].decode(header, buffers);
+}
+
+// correlation id of frame failed to decode, id is last key of json header(undefined if not found)
+function frameId(body, codec) {
+    if (codec != "json") {
+        return undefined;
+    }
+
+    try {
+        const header = body.subarray(4, 4 + body.readUInt32BE(0)).toString("utf-8");
+        const ids = Array.from(header.matchAll(/"id":"([^"\\]+)"/g));
+
+        return ids.length > 0 ? ids[ids.length - 1][1] : undefined;
+    }
+    catch (err) {
+        return undefined;
+    }
+}
+
+// epoch time(ms) with sub-ms precision, same clock as python
+function now() {
+    return performance.timeOrigin + performance.now();
+}
+
+function lengthOf(length) {
+    const buffer = Buffer.alloc(4);
+    buffer.writeUInt32BE(length, 0);
+
+    return buffer;
+}
+
+// channel between generated nodes(and routes) and python
+class Bridge {
+    constructor() {
+        this.configs = null;
+        this.socket = null;
+        this.connected = false;
+        // received chunks not split into frames yet, joined once whole frame received
+        this.chunks = [];
+        this.buffered = 0;
+        // requests not sent yet(socket not connected)
+        this.queue = [];
+        // requests waiting result, by correlation id
+        this.pending = new Map();
+        // requests refused by busy python, sent again when other request finished
+        this.held = [];
+        this.seq = 0;
+        this.polling = false;
+        // listeners of control frames(frames without id) from python
+        this.controlListeners = [];
+        this.controlSeq = 0;
+        this.reconnectDelay = RECONNECT_DELAY;
+    }
+
+    configure(configs) {
+        this.configs = configs;
+
+        if (configs != null) {
+            if (configs.mode == "socket") {
+                this.connect();
+            }
+            else {
+                setTimeout(() => this.pollControl(), CONTROL_INTERVAL).unref();
+            }
+        }
+    }
+
+    // listener(frame) called for control frames, like { type: "reload", ... }
+    onControl(listener) {
+        this.controlListeners.push(listener);
+    }
+
+    connect() {
+        const address = this.configs.path != undefined ?
+            { path: this.configs.path } : { host: this.configs.host, port: this.configs.port };
+
+        this.socket = net.createConnection(address);
+        this.socket.on("connect", () => {
+            this.connected = true;
+            this.reconnectDelay = RECONNECT_DELAY;
+
+            const queue = this.queue;
+            this.queue = [];
+            for (var data of queue) {
+                this.send(data);
+            }
+        });
+        this.socket.on("data", (chunk) => {
+            this.receive(chunk);
+        });
+        this.socket.on("error", (err) => {
+            // log once while reconnecting
+            if (this.reconnectDelay == RECONNECT_DELAY) {
+                console.error(`nodered.py bridge error: ${err.message}`);
+            }
+        });
+        this.socket.on("close", () => {
+            this.connected = false;
+            this.chunks = [];
+            this.buffered = 0;
+
+            // fail all waiting requests
+            const pending = this.pending;
+            this.pending = new Map();
+            this.queue = [];
+            this.held = [];
+            for (var [ id, item ] of pending) {
+                item.onResult({ type: "result", id: id, state: "fail", message: "nodered.py bridge closed" });
+            }
+
+            // python may be busy or restarting bridge, requests until connected are queued
+            setTimeout(() => this.connect(), this.reconnectDelay).unref();
+            this.reconnectDelay = Math.min(this.reconnectDelay * 2, MAX_RECONNECT_DELAY);
+        });
+    }
+
+    // send request to python, returns immediately
+    // onMessage(frame) called for log, warn, error, status of node
+    // onResult(frame) called once with result
+    // traceKey correlates trace of sampled request(_msgid), request id if not set
+    request(data, onMessage, onResult, traceKey) {
+        data.id = `${Date.now().toString(36)}-${(++this.seq).toString(36)}`;
+        const item = { data: data, onMessage: onMessage, onResult: onResult, messageSeq: 0, retryDelay: RETRY_DELAY, trace: null };
+        if (this.configs.traceRate > 0 && Math.random() < this.configs.traceRate) {
+            data.trace = true;
+            item.trace = { key: traceKey || data.id, start: now(), spans: [] };
+        }
+
+        this.pending.set(data.id, item);
+        this.send(data);
+
+        return data.id;
+    }
+
+    // add span ended now to sampled request
+    span(id, name, start) {
+        const item = this.pending.get(id);
+        if (item != undefined && item.trace != null) {
+            item.trace.spans.push({ name: name, side: "node-red", start: start, end: now() });
+        }
+    }
+
+    // send spans of sampled request to python, after result handled
+    finishTrace(item, frame, received, outputStart) {
+        const trace = item.trace, end = now();
+        const spans = trace.spans.concat(frame.trace || []);
+
+        if (frame.trace != undefined && frame.trace.length > 0) {
+            // python encoded result and sent
+            spans.push({ name: "bridge.out", side: "node-red", start: Math.max(...frame.trace.map((span) => span.end)), end: received });
+        }
+        spans.push({ name: "decode", side: "node-red", start: received, end: outputStart });
+        spans.push({ name: "output", side: "node-red", start: outputStart, end: end });
+
+        // no result for trace
+        this.send({
+            type: "trace", id: `${item.data.id}-trace`, key: trace.key, kind: item.data.type,
+            name: item.data.type == "node" ? item.data.name : `${item.data.method} ${item.data.url}`,
+            start: trace.start, end: end, spans: spans
+        });
+    }
+
+    send(data) {
+        // for bridge latency in metrics of python
+        data.sent = now();
+        try {
+            if (this.configs.mode == "socket") {
+                if (this.connected) {
+                    this.write(data);
+                }
+                else {
+                    this.queue.push(data);
+                }
+            }
+            else {
+                this.writeFile(data);
+            }
+        }
+        catch (err) {
+            // cannot encode(circular, BigInt, ...)
+            this.fail(data.id, err);
+        }
+    }
+
+    // end request with fail result, for frames cannot be sent or received
+    fail(id, err) {
+        console.error(`nodered.py bridge error: ${err.message}`);
+
+        const item = this.pending.get(id);
+        if (item == undefined) {
+            return;
+        }
+
+        this.pending.delete(id);
+        try {
+            item.onResult({ type: "result", id: id, state: "fail", message: `nodered.py bridge error: ${err.stack || err.message}` });
+        }
+        catch (resultErr) {
+            console.error(`nodered.py bridge error: ${resultErr.message}`);
+        }
+    }
+
+    write(data) {
+        const start = now();
+        const parts = encodeFrame(data, this.configs.codec);
+        this.span(data.id, "encode", start);
+
+        // write parts without joining
+        this.socket.cork();
+        this.socket.write(lengthOf(parts.reduce((total, part) => total + part.length, 0)));
+        for (var part of parts) {
+            this.socket.write(part);
+        }
+        this.socket.uncork();
+    }
+
+    receive(chunk) {
+        this.chunks.push(chunk);
+        this.buffered += chunk.length;
+
+        // split length-prefixed frames
+        while (this.buffered >= 4) {
+            const length = (this.chunks[0].length >= 4 ? this.chunks[0] : this.joinChunks()).readUInt32BE(0);
+            if (this.buffered < 4 + length) {
+                break;
+            }
+
+            const received = now();
+            const buffer = this.joinChunks();
+            const body = buffer.subarray(4, 4 + length);
+            this.chunks = buffer.length > 4 + length ? [ buffer.subarray(4 + length) ] : [];
+            this.buffered = buffer.length - 4 - length;
+
+            var frame;
+            try {
+                frame = decodeFrame(body, this.configs.codec);
+            }
+            catch (err) {
+                this.fail(frameId(body, this.configs.codec), err);
+                continue;
+            }
+
+            this.handle(frame, received);
+        }
+    }
+
+    // join received chunks into one Buffer, copies only when more than one chunk
+    joinChunks() {
+        if (this.chunks.length > 1) {
+            this.chunks = [ Buffer.concat(this.chunks, this.buffered) ];
+        }
+
+        return this.chunks[0];
+    }
+
+    // dispatch, errors of handlers fail only request of frame
+    handle(frame, received) {
+        try {
+            this.dispatch(frame, received);
+        }
+        catch (err) {
+            this.fail(frame.id, err);
+        }
+    }
+
+    // pass frame to request of same correlation id, received is time(ms) before decode
+    dispatch(frame, received) {
+        if (frame.id == undefined) {
+            for (var listener of this.controlListeners) {
+                listener(frame);
+            }
+
+            return;
+        }
+
+        const item = this.pending.get(frame.id);
+        if (item == undefined) {
+            return;
+        }
+
+        if (frame.type == "message") {
+            if (item.onMessage) {
+                item.onMessage(frame);
+            }
+        }
+        else if (frame.type == "busy") {
+            // queue of python is full, send again later
+            if (item.onMessage) {
+                item.onMessage({ type: "message", id: frame.id, status: { fill: "yellow", shape: "ring", text: "Busy, waiting" } });
+            }
+
+            this.held.push(frame.id);
+            // in case no request finishes(python busy with other clients)
+            setTimeout(() => this.release(frame.id), item.retryDelay);
+            item.retryDelay = Math.min(item.retryDelay * 2, MAX_RETRY_DELAY);
+        }
+        else {
+            this.pending.delete(frame.id);
+            const outputStart = now();
+            item.onResult(frame);
+            if (item.trace != null) {
+                this.finishTrace(item, frame, received || outputStart, outputStart);
+            }
+
+            // worker of python freed
+            if (this.held.length > 0) {
+                this.release(this.held[0]);
+            }
+        }
+    }
+
+    // send held request again
+    release(id) {
+        const index = this.held.indexOf(id);
+        if (index < 0) {
+            return;
+        }
+
+        this.held.splice(index, 1);
+        if (this.pending.has(id)) {
+            this.send(this.pending.get(id).data);
+        }
+    }
+
+    // fallback mode, handoff with frame files(named by correlation id) in cache directory
+    writeFile(data) {
+        const inpFile = path.join(this.configs.cacheDir, `${data.type}_input_${data.id}.frame`);
+
+        // write and rename, so python never reads half-written file
+        const start = now();
+        fs.writeFileSync(`${inpFile}.tmp`, Buffer.concat(encodeFrame(data, this.configs.codec)));
+        fs.renameSync(`${inpFile}.tmp`, inpFile);
+        this.span(data.id, "write", start);
+
+        if (!this.polling) {
+            this.polling = true;
+            setTimeout(() => this.poll(), POLL_INTERVAL);
+        }
+    }
+
+    // check outputs of all waiting requests without blocking event loop
+    poll() {
+        for (var [ id, item ] of Array.from(this.pending)) {
+            // messages are numbered by python to keep order
+            while (true) {
+                const frame = this.readFile(path.join(this.configs.cacheDir, `message_${id}_${item.messageSeq}.frame`), id);
+                if (frame == null) {
+                    break;
+                }
+
+                item.messageSeq++;
+                this.handle(frame);
+            }
+
+            const received = now();
+            const resp = this.readFile(path.join(this.configs.cacheDir, `${item.data.type}_output_${id}.frame`), id);
+            if (resp != null) {
+                this.handle(resp, received);
+            }
+        }
+
+        if (this.pending.size > 0) {
+            setTimeout(() => this.poll(), POLL_INTERVAL);
+        }
+        else {
+            this.polling = false;
+        }
+    }
+
+    // control files are numbered by python to keep order
+    pollControl() {
+        while (true) {
+            const file = path.join(this.configs.cacheDir, `control_${this.controlSeq}.frame`);
+            if (!fs.existsSync(file)) {
+                break;
+            }
+
+            // next one even if failed to decode
+            this.controlSeq++;
+            const frame = this.readFile(file);
+            if (frame != null) {
+                this.handle(frame);
+            }
+        }
+
+        setTimeout(() => this.pollControl(), CONTROL_INTERVAL).unref();
+    }
+
+    // python writes and renames, so existing file is complete
+    // frame failed to decode fails request of id(undefined for control), returns null
+    readFile(file, id) {
+        if (!fs.existsSync(file)) {
+            return null;
+        }
+
+        const body = fs.readFileSync(file);
+        fs.unlinkSync(file);
+
+        try {
+            return decodeFrame(body, this.configs.codec);
+        }
+        catch (err) {
+            this.fail(id, err);
+            return null;
+        }
+    }
+}
+
+module.exports = new Bridge();
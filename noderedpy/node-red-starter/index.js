@@ -2,6 +2,7 @@
 const express = require("express"),
     http = require("http"),
     RED = require("node-red"),
+    bridge = require("./bridge"),
     fs = require("fs"), path = require("path");
 
 // read config file
@@ -48,17 +49,71 @@ exapp.use("/", express.static("web"));
 exapp.use(RED.settings.httpAdminRoot, RED.httpAdmin);
 exapp.use(RED.settings.httpNodeRoot, RED.httpNode);
 
+// connect to python
+bridge.configure(configs.bridge);
+
 // map routes
-require("./route").setupRoutes(exapp, configs.cacheDir, configs.routes);
+const route = require("./route");
+route.setupRoutes(exapp, bridge, configs.routes, RED);
+
+// load changed node packages again without restarting Node-RED
+async function reloadModules(frame) {
+    for (var module of frame.modules.concat(frame.removed)) {
+        // generated javascript must be evaluated again
+        const moduleDir = path.join(configs.userDir, "node_modules", module) + path.sep;
+        for (var file of Object.keys(require.cache)) {
+            if (file.startsWith(moduleDir)) {
+                delete require.cache[file];
+            }
+        }
+
+        try {
+            await RED.nodes.removeModule(module);
+        }
+        catch (err) {
+            // new module, not loaded yet
+        }
+    }
+
+    for (var module of frame.modules) {
+        try {
+            await RED.nodes.addModule(module);
+        }
+        catch (err) {
+            console.error(`nodered.py failed to reload ${module}: ${err.message}`);
+        }
+    }
+
+    for (var info of frame.routes) {
+        route.mapRoute(exapp, bridge, info, RED);
+    }
+
+    // restart flows with reloaded nodes
+    if (frame.modules.length + frame.removed.length > 0) {
+        await RED.nodes.loadFlows();
+    }
+}
+
+bridge.onControl((frame) => {
+    if (frame.type == "reload") {
+        reloadModules(frame).catch((err) => console.error(`nodered.py reload failed: ${err.message}`));
+    }
+});
 // set favicon if exists
 const faviconFile = path.join(__dirname, "favicon.ico");
 if (fs.existsSync(faviconFile)) {
     exapp.use("/favicon.ico", express.static(faviconFile));
 }
 
+// stopped by python, close flows before exit
+process.on("SIGTERM", () => {
+    RED.stop().finally(() => process.exit(0));
+});
+
 // start node-red
 RED.start().then(() => {
     RED_server.listen(configs.port, configs.enableRemoteAccess ? "0.0.0.0" : "127.0.0.1", () => {
-        fs.writeFileSync(path.join(__dirname, "started"), "");
+        // python waits this marker
+        process.stdout.write("nodered.py:ready\n");
     });
 });
@@ -1,83 +1,48 @@
+const express = require("express");
 
-const express = require("express"),
-    path = require("path"),
-    fs = require("fs");
-
-function mapGet(exapp, info, inputFile, outputFile) {
-    exapp.get(info.url, ( req, res ) => {
-        fs.writeFileSync(
-            inputFile,
-            JSON.stringify({
-                url: info.url,
-                data: req.params
-            })
-        );
-
-        while (true) {
-            if (fs.existsSync(outputFile)) {
-                var content = JSON.parse(fs.readFileSync(outputFile, { encoding: "utf-8" }));
-                fs.unlinkSync(outputFile);
-                break;
-            }
+function sendContent(res, content) {
+    if (content.state == "success") {
+        if (content.content_type) {
+            res.type(content.content_type);
         }
 
-        if (content.state == "success") {
-            if (typeof(content.data) == "string" || content.data instanceof String) {
-                res.send(content.data);
-            }
-            else {
-                res.json(content.data);
-            }
+        if (typeof(content.data) == "string" || content.data instanceof String) {
+            res.send(content.data);
         }
         else {
-            res.json(content);
+            res.json(content.data);
         }
+    }
+    else {
+        delete content.type;
+        delete content.id;
+        res.status(500).json(content);
+    }
+}
 
-        // try {
-        //     res.json(JSON.parse(content));
-        // }
-        // catch {
-        //     res.send(content);
-        // }
+function mapGet(exapp, bridge, info, guards) {
+    exapp.get(info.url, ...guards, ( req, res ) => {
+        bridge.request({
+            type: "route",
+            method: "get",
+            url: info.url,
+            data: req.params
+        }, null, (content) => {
+            sendContent(res, content);
+        });
     });
 }
 
-function mapPost(exapp, info, inputFile, outputFile) {
-    exapp.post(info.url, ( req, res ) => {
-        fs.writeFileSync(
-            inputFile,
-            JSON.stringify({
-                url: info.url,
-                data: req.body
-            })
-        );
-
-        while (true) {
-            if (fs.existsSync(outputFile)) {
-                var content = JSON.parse(fs.readFileSync(outputFile));
-                fs.unlinkSync(outputFile);
-                break;
-            }
-        }
-
-        if (content.state == "success") {
-            if (typeof(content.data) == "string" || content.data instanceof String) {
-                res.send(content.data);
-            }
-            else {
-                res.json(content.data);
-            }
-        }
-        else {
-            res.json(content);
-        }
-
-        // try {
-        //     res.json(JSON.parse(content));
-        // }
-        // catch {
-        //     res.send(content);
-        // }
+function mapPost(exapp, bridge, info, guards) {
+    exapp.post(info.url, ...guards, ( req, res ) => {
+        bridge.request({
+            type: "route",
+            method: "post",
+            url: info.url,
+            data: req.body
+        }, null, (content) => {
+            sendContent(res, content);
+        });
     });
 }
 
@@ -85,23 +50,30 @@ function mapStatic(exapp, info) {
     exapp.use(info.url, express.static(info.path));
 }
 
+// admin routes are served under httpAdminRoot, with adminAuth(write permission) of Node-RED
+function mapRoute(exapp, bridge, info, RED) {
+    const app = info.admin ? RED.httpAdmin : exapp;
+    const guards = info.admin ? [ RED.auth.needsPermission("nodered-py.write") ] : [];
+
+    if (info.method == "get") {
+        mapGet(app, bridge, info, guards);
+    }
+    else if (info.method == "post") {
+        mapPost(app, bridge, info, guards);
+    }
+    else if (info.method == "static") {
+        mapStatic(exapp, info);
+    }
+}
+
 module.exports = {
-    setupRoutes(exapp, cacheDir, userRoutes) {
+    mapRoute: mapRoute,
+    setupRoutes(exapp, bridge, userRoutes, RED) {
         exapp.use(express.json());
         exapp.use(express.urlencoded({ extended: true }));
 
-        const inputFile = path.join(cacheDir, "route_input.json");
-        const outputFile = path.join(cacheDir, "route_output.json");
         for (var info of userRoutes) {
-            if (info.method == "get") {
-                mapGet(exapp, info, inputFile, outputFile);
-            }
-            else if (info.method == "post") {
-                mapPost(exapp, info, inputFile, outputFile);
-            }
-            else if (info.method == "static") {
-                mapStatic(exapp, info);
-            }
+            mapRoute(exapp, bridge, info, RED);
         }
     }
 };
@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+
+from .bridge import Bridge
+from .socket_bridge import SocketBridge
+from .file_bridge import FileBridge
+
+
+__all__ = [
+    "Bridge", "SocketBridge", "FileBridge"
+]
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+import asyncio
+from types import MethodType
+from abc import ABCMeta, abstractmethod
+from .codec import Codec, get_codec
+
+
+class Bridge(metaclass = ABCMeta):
+    """
+    Base class of message channel between generated Node-RED nodes and python
+
+    Node-RED side sends request frames tagged with unique correlation id
+        - { "type": "node", "id": ..., "name": ..., "props": ..., "msg": ... }
+        - { "type": "route", "id": ..., "method": ..., "url": ..., "data": ... }
+
+    python side answers with frames tagged with id of request
+        - { "type": "message", "id": ..., "name": ..., "log" | "warn" | "error" | "status": ... }
+        - { "type": "result", "id": ..., "state": "success" | "fail", ... }
+        - { "type": "busy", "id": ... }
+
+    so many requests can be in flight at once
+
+    python side also sends control frames without id(see `notify`)
+        - { "type": "reload", "modules": [ ... ], "removed": [ ... ], "routes": [ ... ] }
+    """
+    def __init__(self, cache_dir:str, handler:MethodType, codec:str = "json"):
+        """
+        Parameters
+        ----------
+        cache_dir: str, required
+            cache directory of Node-RED user_dir
+        handler: MethodType, required
+            function called with ( request:dict, send:MethodType ) for each request frame
+            frames passed to `send` are tagged with id of request
+        codec: str, default json
+            serializer of frames
+            options: json, orjson, msgpack
+        """
+        self.cache_dir, self.handler = cache_dir, handler
+        self.codec:Codec = get_codec(codec)
+
+    @abstractmethod
+    def open(self):
+        """
+        Prepare channel before Node-RED starts
+        """
+        pass
+
+    @abstractmethod
+    async def serve(self):
+        """
+        Receive requests on running event loop until `close` called
+        handler is called on thread of event loop
+        """
+        pass
+
+    def serve_forever(self):
+        """
+        Receive requests on new event loop until `close` called
+        """
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(self.serve())
+        finally:
+            loop.close()
+
+    @abstractmethod
+    def notify(self, frame:dict):
+        """
+        Send control frame(not answer of request) to Node-RED side, can be called from any thread
+        """
+        pass
+
+    @abstractmethod
+    def close(self):
+        """
+        Close channel
+        """
+        pass
+
+    @abstractmethod
+    def to_dict(self) -> dict:
+        """
+        Configs of channel for Node-RED side
+        """
+        pass
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+import json, math, struct
+from types import MethodType
+from typing import List, Union, Any
+from abc import ABCMeta, abstractmethod
+
+
+# key of placeholder for binary section in header
+BUFFER_KEY = "__nrpy_buffer__"
+
+_length = struct.Struct(">I")
+
+class Codec(metaclass = ABCMeta):
+    """
+    Serializer of frame header
+
+    name: name to select codec
+    wire: format on wire, Node-RED side decodes with this(json, msgpack)
+    """
+    name:str = None
+    wire:str = None
+
+    @abstractmethod
+    def dumps(self, obj:Any, default:MethodType) -> bytes:
+        pass
+
+    @abstractmethod
+    def loads(self, data:bytes, object_hook:MethodType = None) -> Any:
+        pass
+
+class JSONCodec(Codec):
+    """
+    Compact json with standard library
+    """
+    name, wire = "json", "json"
+
+    def dumps(self, obj:Any, default:MethodType) -> bytes:
+        # ascii escapes keep lone surrogates(valid in JSON.stringify of Node-RED)
+        # NaN, Infinity raise ValueError, JSON.parse of Node-RED cannot parse them
+        return json.dumps(obj, default = default, separators = ( ",", ":" ), allow_nan = False).encode("ascii")
+
+    def loads(self, data:bytes, object_hook:MethodType = None) -> Any:
+        return json.loads(data, object_hook = object_hook)
+
+class OrjsonCodec(Codec):
+    """
+    Json with `orjson`(python side only, same format on wire)
+    """
+    name, wire = "orjson", "json"
+
+    def __init__(self):
+        import orjson
+        self.__orjson = orjson
+
+    def dumps(self, obj:Any, default:MethodType) -> bytes:
+        data = self.__orjson.dumps(obj, default = default, option = self.__orjson.OPT_NON_STR_KEYS)
+        # orjson writes NaN, Infinity as null, raise same as json codec
+        if b"null" in data:
+            _check_finite(obj)
+
+        return data
+
+    def loads(self, data:bytes, object_hook:MethodType = None) -> Any:
+        obj = self.__orjson.loads(data)
+        return obj if object_hook is None else _hook(obj, object_hook)
+
+class MsgpackCodec(Codec):
+    """
+    MessagePack with `msgpack`(Node-RED side uses `@msgpack/msgpack`)
+    """
+    name, wire = "msgpack", "msgpack"
+
+    def __init__(self):
+        import msgpack
+        self.__msgpack = msgpack
+
+    def dumps(self, obj:Any, default:MethodType) -> bytes:
+        # binary values are packed inline as bin type
+        return self.__msgpack.packb(obj, default = default, use_bin_type = True)
+
+    def loads(self, data:bytes, object_hook:MethodType = None) -> Any:
+        return self.__msgpack.unpackb(data, raw = False, object_hook = object_hook)
+
+CODECS = {
+    codec.name: codec
+    for codec in ( JSONCodec, OrjsonCodec, MsgpackCodec )
+}
+
+def get_codec(name:str) -> Codec:
+    """
+    Create codec by name
+
+    Parameters
+    ----------
+    name: str, required
+        options: json, orjson, msgpack
+    """
+    if not name in CODECS:
+        raise ValueError(f"`codec` must be one of {', '.join(map(repr, CODECS))}!")
+
+    try:
+        return CODECS[name]()
+    except ImportError:
+        raise ImportError(f"codec '{name}' requires `{name}` package, install with `pip install {name}`")
+
+# raise same error as json for NaN, Infinity
+def _check_finite(obj:Any):
+    if isinstance(obj, float):
+        if not math.isfinite(obj):
+            raise ValueError("Out of range float values are not JSON compliant")
+    elif isinstance(obj, dict):
+        for value in obj.values():
+            _check_finite(value)
+    elif isinstance(obj, ( list, tuple )):
+        for item in obj:
+            _check_finite(item)
+
+# apply object_hook to all dicts, bottom-up like json
+def _hook(obj:Any, object_hook:MethodType) -> Any:
+    if isinstance(obj, dict):
+        return object_hook({ key: _hook(value, object_hook) for key, value in obj.items() })
+    if isinstance(obj, list):
+        return [ _hook(item, object_hook) for item in obj ]
+
+    return obj
+
+def encode_frame(frame:dict, codec:Codec) -> List[Union[bytes, bytearray, memoryview]]:
+    """
+    Encode frame to parts of body
+
+    body is 4 bytes length + header, and 4 bytes length + raw bytes for each binary value
+    `bytes`, `bytearray`, `memoryview` values are carried as binary section, not in header
+    (msgpack packs them in header as bin type)
+
+    Return
+    ------
+    parts: List[bytes-like]
+        parts of body, join or write in order
+    """
+    buffers = []
+
+    def default(obj):
+        if isinstance(obj, ( bytes, bytearray, memoryview )):
+            buffers.append(obj)
+            return { BUFFER_KEY: len(buffers) - 1 }
+
+        raise TypeError(f"Object of type {type(obj).__name__} is not serializable")
+
+    header = codec.dumps(frame, default)
+    parts = [ _length.pack(len(header)), header ]
+    for buffer in buffers:
+        parts.append(_length.pack(memoryview(buffer).nbytes))
+        parts.append(buffer)
+
+    return parts
+
+def decode_frame(body:Union[bytes, bytearray, memoryview], codec:Codec) -> dict:
+    """
+    Decode body of frame, binary sections become `memoryview` on body(no copy)
+    """
+    view = memoryview(body)
+    header_length, = _length.unpack_from(view, 0)
+    header = bytes(view[4:4 + header_length])
+
+    buffers:List[memoryview] = []
+    offset = 4 + header_length
+    while offset < len(view):
+        buffer_length, = _length.unpack_from(view, offset)
+        buffers.append(view[offset + 4:offset + 4 + buffer_length])
+        offset += 4 + buffer_length
+
+    if len(buffers) == 0:
+        return codec.loads(header)
+
+    return codec.loads(header, lambda obj: buffers[obj[BUFFER_KEY]] if len(obj) == 1 and BUFFER_KEY in obj else obj)
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+import os, itertools, threading, asyncio, traceback
+from types import MethodType
+from .bridge import Bridge
+from .codec import encode_frame, decode_frame
+
+
+# interval(second) to check input files
+POLL_INTERVAL = 0.001
+
+class FileBridge(Bridge):
+    """
+    Bridge over frame files(see `codec.encode_frame`) in cache directory (fallback mode)
+
+    files are named by correlation id of request
+        - {type}_input_{id}.frame: request from Node-RED
+        - {type}_output_{id}.frame: result from python
+        - message_{id}_{seq}.frame: messages from python, numbered in order
+        - control_{seq}.frame: control frames from python, numbered in order
+    """
+    def __init__(self, cache_dir:str, handler:MethodType, codec:str = "json"):
+        super().__init__(cache_dir, handler, codec)
+        self.__closed = False
+        self.__control_seq, self.__control_lock = itertools.count(), threading.Lock()
+
+    def open(self):
+        self.__closed = False
+
+    async def serve(self):
+        while not self.__closed:
+            found = False
+            for entry in os.scandir(self.cache_dir):
+                if "_input_" in entry.name and entry.name.endswith(".frame"):
+                    self.__check_input(entry.path)
+                    found = True
+
+            # check again at once while requests coming
+            await asyncio.sleep(0 if found else POLL_INTERVAL)
+
+    # read input file and pass to handler
+    def __check_input(self, input_file:os.PathLike):
+        # Node-RED renames after writing, so file is complete
+        try:
+            with open(input_file, "rb") as ifr:
+                body = ifr.read()
+
+            os.remove(input_file)
+        except FileNotFoundError:
+            return
+
+        # type and id from name, so broken frame is answered too
+        request_type, request_id = os.path.basename(input_file)[:-len(".frame")].split("_input_", 1)
+        send = self.__sender({ "type": request_type, "id": request_id })
+        try:
+            self.handler(decode_frame(body, self.codec), send)
+        except:
+            traceback.print_exc()
+            send({ "type": "result", "state": "fail", "message": traceback.format_exc() })
+
+    def __sender(self, request:dict) -> MethodType:
+        output_file = os.path.join(self.cache_dir, f"{request['type']}_output_{request['id']}.frame")
+        message_seq, seq_lock = itertools.count(), threading.Lock()
+
+        def send(frame:dict):
+            frame = dict(frame, id = request["id"])
+            # encode before open, so serialize errors not leave broken file
+            content = b"".join(encode_frame(frame, self.codec))
+
+            if frame["type"] == "message":
+                with seq_lock:
+                    self.__write(os.path.join(self.cache_dir, f"message_{request['id']}_{next(message_seq)}.frame"), content)
+            else:
+                self.__write(output_file, content)
+
+        return send
+
+    def notify(self, frame:dict):
+        content = b"".join(encode_frame(frame, self.codec))
+        with self.__control_lock:
+            self.__write(os.path.join(self.cache_dir, f"control_{next(self.__control_seq)}.frame"), content)
+
+    # write and rename, so Node-RED never reads half-written file
+    def __write(self, file:os.PathLike, content:bytes):
+        with open(f"{file}.tmp", "wb") as fw:
+            fw.write(content)
+
+        os.replace(f"{file}.tmp", file)
+
+    def close(self):
+        self.__closed = True
+
+    def to_dict(self) -> dict:
+        return { "mode": "file", "codec": self.codec.wire, "cacheDir": self.cache_dir }
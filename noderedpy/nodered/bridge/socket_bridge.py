@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+import os, socket, struct, asyncio, traceback
+from types import MethodType
+from .bridge import Bridge
+from .codec import encode_frame, decode_frame
+
+
+class SocketBridge(Bridge):
+    """
+    Bridge over persistent unix domain socket(local tcp socket if not available)
+
+    each frame is 4 bytes big-endian length + body(see `codec.encode_frame`)
+    """
+    def __init__(self, cache_dir:str, handler:MethodType, codec:str = "json"):
+        super().__init__(cache_dir, handler, codec)
+
+        self.__sock:socket.socket = None
+        self.__address:dict = None
+        self.__loop:asyncio.AbstractEventLoop = None
+        self.__closed:asyncio.Event = None
+        # connected clients, for control frames
+        self.__writers:set = set()
+        self.__handlers:set = set()
+
+    def open(self):
+        socket_file = os.path.join(self.cache_dir, "bridge.sock")
+
+        # path of unix domain socket is limited about 100 bytes
+        if hasattr(socket, "AF_UNIX") and len(socket_file.encode("utf-8")) < 100:
+            if os.path.exists(socket_file):
+                os.remove(socket_file)
+
+            self.__sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.__sock.bind(socket_file)
+            self.__address = { "path": socket_file }
+        else:
+            self.__sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.__sock.bind(( "127.0.0.1", 0 ))
+            self.__address = { "host": "127.0.0.1", "port": self.__sock.getsockname()[1] }
+
+        self.__sock.listen()
+
+    async def serve(self):
+        self.__loop, self.__closed = asyncio.get_event_loop(), asyncio.Event()
+
+        try:
+            if self.__sock.family == socket.AF_INET:
+                server = await asyncio.start_server(self.__on_connect, sock = self.__sock)
+            else:
+                server = await asyncio.start_unix_server(self.__on_connect, sock = self.__sock)
+
+            async with server:
+                await self.__closed.wait()
+
+            # close clients, and wait their handlers end
+            for writer in list(self.__writers):
+                writer.close()
+
+            if len(self.__handlers) > 0:
+                await asyncio.wait(list(self.__handlers))
+        finally:
+            self.__loop = None
+            self.__release()
+
+    async def __on_connect(self, reader:asyncio.StreamReader, writer:asyncio.StreamWriter):
+        self.__writers.add(writer)
+        self.__handlers.add(asyncio.current_task())
+        try:
+            while True:
+                length, = struct.unpack(">I", await reader.readexactly(4))
+                body = await reader.readexactly(length)
+                try:
+                    request = decode_frame(body, self.codec)
+                except:
+                    # id is unknown, next frames are still read
+                    traceback.print_exc()
+                    continue
+
+                send = self.__sender(writer, request.get("id"))
+                try:
+                    self.handler(request, send)
+                except:
+                    traceback.print_exc()
+                    send({ "type": "result", "state": "fail", "message": traceback.format_exc() })
+        except ( asyncio.IncompleteReadError, ConnectionError ):
+            pass
+        finally:
+            self.__writers.discard(writer)
+            self.__handlers.discard(asyncio.current_task())
+            writer.close()
+
+    def __sender(self, writer:asyncio.StreamWriter, request_id:str) -> MethodType:
+        def send(frame:dict):
+            self.__send([ writer ], dict(frame, id = request_id))
+
+        return send
+
+    def notify(self, frame:dict):
+        self.__send(None, frame)
+
+    def __send(self, writers:list, frame:dict):
+        # encode on caller thread, so serialize errors raise to caller
+        parts = encode_frame(frame, self.codec)
+        parts.insert(0, struct.pack(">I", sum(memoryview(part).nbytes for part in parts)))
+
+        loop = self.__loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self.__write, writers, parts)
+
+    def __write(self, writers:list, parts:list):
+        # None for all clients
+        for writer in list(self.__writers) if writers is None else writers:
+            if not writer.is_closing():
+                writer.writelines(parts)
+
+    def close(self):
+        # server releases socket itself when serving
+        loop = self.__loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self.__stop)
+        else:
+            self.__release()
+
+    def __stop(self):
+        if self.__closed is not None:
+            self.__closed.set()
+
+    def __release(self):
+        if self.__sock is not None:
+            self.__sock.close()
+            if "path" in self.__address and os.path.exists(self.__address["path"]):
+                os.remove(self.__address["path"])
+
+            self.__sock = None
+
+    def to_dict(self) -> dict:
+        return dict(mode = "socket", codec = self.codec.wire, **self.__address)
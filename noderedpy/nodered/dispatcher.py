@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+import os, time, asyncio, traceback
+from types import MethodType
+from threading import Lock
+from .node.node import Node
+from .node.executor import NodeExecutor, ProcessNodeExecutor, AsyncNodeExecutor
+from .route import Route
+from .registry import Registry
+from .metrics import Metrics
+from .tracer import Tracer, record_span
+
+
+# interval(second) to check messages in flight while draining
+DRAIN_INTERVAL = 0.01
+
+class Dispatcher:
+    """
+    Runs requests from bridge on registered Nodes and routes, with bounded executors
+
+    handler of bridge for RED, can serve bridge without RED(benchmarks)
+    """
+    def __init__(self, registry:Registry, loop:asyncio.AbstractEventLoop, concurrency:int, queue_size:int, metrics:Metrics = None, tracer:Tracer = None):
+        """
+        Parameters
+        ----------
+        registry: Registry, required
+            Nodes and routes to dispatch
+        loop: AbstractEventLoop, required
+            event loop of bridge, `async def` Node functions and routes run on this loop
+        concurrency: int, required
+            number of shared workers to run Node functions(and routes, in own workers)
+        queue_size: int, required
+            number of messages can wait for workers, answered busy over this
+        metrics: Metrics, default None
+            metrics to record, new one if None
+        tracer: Tracer, default None
+            tracer to collect traces, new one if None
+        """
+        self.registry, self.loop, self.concurrency, self.queue_size = registry, loop, concurrency, queue_size
+        self.metrics = Metrics() if metrics is None else metrics
+        self.tracer = Tracer() if tracer is None else tracer
+
+        # requests in flight, for graceful stop
+        self.__in_flight, self.__in_flight_lock, self.__draining = 0, Lock(), False
+
+        # routes run concurrently, in own workers not to wait for nodes
+        self.__route_executor = NodeExecutor(concurrency, queue_size)
+        self.__async_route_executor = AsyncNodeExecutor(loop, queue_size = queue_size)
+        self.__executor, self.__async_executor = NodeExecutor(concurrency, queue_size), AsyncNodeExecutor(loop, queue_size = queue_size)
+        # executors only for a Node, stopped with shared ones
+        self.__node_executors = []
+
+    @property
+    def in_flight(self) -> int:
+        """
+        number of requests accepted and not finished
+        """
+        return self.__in_flight
+
+    def prepare_node(self, node:Node, previous:Node = None):
+        """
+        Set executor of Node, executor of previous Node(replaced by reload) is kept if settings same
+        """
+        if previous is not None and node.executor_type != "process" and\
+            ( node.is_async, node.executor_type, node.concurrency ) == ( previous.is_async, previous.executor_type, previous.concurrency ):
+            node.executor = previous.executor
+        elif node.is_async:
+            node.executor = self.__async_executor if node.concurrency is None else AsyncNodeExecutor(self.loop, node.concurrency, self.queue_size)
+        elif node.executor_type == "process":
+            node.executor = ProcessNodeExecutor(node.concurrency or os.cpu_count() or 1, self.queue_size)
+        elif node.concurrency is not None:
+            node.executor = NodeExecutor(node.concurrency, self.queue_size)
+        else:
+            node.executor = self.__executor
+
+        if not node.executor in ( self.__executor, self.__async_executor ) and not node.executor in self.__node_executors:
+            self.__node_executors.append(node.executor)
+
+        node.executor.start()
+        node.metrics = self.metrics
+        # messages wait for batch up to queue_size, same as executors
+        if node.batcher is not None:
+            node.batcher.queue_size = self.queue_size
+
+    # count request in flight until result(or busy) sent, sampled request carries spans in result
+    def __track(self, send:MethodType, kind:str, name:str, spans:list = None) -> MethodType:
+        with self.__in_flight_lock:
+            self.__in_flight += 1
+
+        self.metrics.enter(kind, name)
+        finished = []
+
+        def tracked_send(frame:dict):
+            if spans is not None and frame["type"] == "result":
+                frame = dict(frame, trace = spans)
+
+            send(frame)
+            if frame["type"] in ( "result", "busy" ) and len(finished) == 0:
+                finished.append(True)
+                with self.__in_flight_lock:
+                    self.__in_flight -= 1
+
+                self.metrics.exit(kind, name, frame.get("state", "fail") if frame["type"] == "result" else "busy")
+
+        # see `record_span`
+        tracked_send.spans = spans
+        return tracked_send
+
+    async def drain(self, drain_timeout:float):
+        """
+        Wait requests in flight until deadline, new requests are answered busy after called
+        """
+        self.__draining = True
+
+        deadline = time.monotonic() + drain_timeout
+        while self.__in_flight > 0 and time.monotonic() < deadline:
+            await asyncio.sleep(DRAIN_INTERVAL)
+
+        if self.__in_flight > 0:
+            print(f"{self.__in_flight} messages not finished in {drain_timeout} seconds")
+
+        # write outputs sent at last
+        await asyncio.sleep(0)
+
+    def shutdown(self):
+        """
+        Stop shared and per Node executors, after requests drained
+        """
+        for executor in [ self.__executor, self.__async_executor, self.__route_executor, self.__async_route_executor ] + self.__node_executors:
+            executor.shutdown()
+
+    def handle(self, request:dict, send:MethodType):
+        """
+        Handler of bridge, queue request to Node or route(result is sent by `send`)
+        """
+        # spans of sampled message, sent by Node-RED side after result
+        if request["type"] == "trace":
+            self.tracer.add(request)
+            return
+
+        # stopping, Node-RED side retries later
+        if self.__draining:
+            send({ "type": "busy" })
+            return
+
+        if request["type"] == "node":
+            kind, name = "node", request["name"]
+        else:
+            kind, name = "route", f"{request['method']} {request['url']}"
+
+        # sent(ms) is set by Node-RED side, on same clock
+        spans = None
+        if "sent" in request:
+            received = time.time() * 1000
+            self.metrics.observe(kind, name, "bridge", (received - request["sent"]) / 1000)
+            if request.get("trace"):
+                spans = [ { "name": "bridge", "side": "python", "start": request["sent"], "end": received } ]
+
+        send = self.__track(send, kind, name, spans)
+        # answer fail, so request is not left in flight
+        try:
+            self.__dispatch(request, send)
+        except:
+            traceback.print_exc()
+            send({ "type": "result", "state": "fail", "name": name, "message": traceback.format_exc() })
+
+    def __dispatch(self, request:dict, send:MethodType):
+        if request["type"] == "node":
+            node = self.registry.get_node(request["name"])
+            if node is None:
+                send({ "type": "result", "state": "fail", "name": request["name"], "message": f"Node `{request['name']}` is not registered" })
+            # queue is full, Node-RED side retries later
+            elif not node.run(request["props"], request["msg"], send):
+                send({ "type": "busy" })
+        elif request["type"] == "route":
+            route = self.registry.get_route(request["method"], request["url"])
+            if route is None:
+                send({ "type": "result", "state": "fail", "message": f"route `{request['method']} {request['url']}` is not registered" })
+                return
+
+            if route.is_async:
+                accepted = self.__async_route_executor.submit(self.__run_route_async, route, request["data"], send, time.perf_counter())
+            else:
+                accepted = self.__route_executor.submit(self.__run_route, route, request["data"], send, time.perf_counter())
+
+            # Express side retries later
+            if not accepted:
+                send({ "type": "busy" })
+
+    # run route and send result
+    def __run_route(self, route:Route, data:dict, send:MethodType, queued:float):
+        started = self.__observe_route(route, "queue", queued, send)
+        res = route.run(data)
+        self.__observe_route(route, "exec", started, send)
+        self.__respond_route(res, send)
+
+    # run `async def` route on event loop and send result
+    async def __run_route_async(self, route:Route, data:dict, send:MethodType, queued:float):
+        started = self.__observe_route(route, "queue", queued, send)
+        res = await route.run_async(data)
+        self.__observe_route(route, "exec", started, send)
+        self.__respond_route(res, send)
+
+    # record latency of phase from `since`(and span of sampled request), returns now
+    def __observe_route(self, route:Route, phase:str, since:float, send:MethodType) -> float:
+        now = time.perf_counter()
+        self.metrics.observe("route", f"{route.method} {route.url}", phase, now - since)
+        record_span(send, phase, now - since)
+
+        return now
+
+    def __respond_route(self, res:dict, send:MethodType):
+        res["type"] = "result"
+        try:
+            send(res)
+        except ( TypeError, ValueError ):
+            # returned data may not serializable
+            send({ "type": "result", "state": "fail", "message": traceback.format_exc() })
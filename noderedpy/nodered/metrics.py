@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+from bisect import bisect_left
+from typing import List, Dict, Tuple
+from threading import Lock
+try:
+    from typing import Literal
+except:
+    from typing_extensions import Literal
+
+
+# upper bounds(second) of latency buckets
+METRIC_BUCKETS = ( 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10 )
+# phases of latency, see `Metrics.observe`
+PHASES = ( "bridge", "queue", "exec" )
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+class Histogram:
+    """
+    Cumulative histogram of latencies(second), not thread-safe(guarded by Metrics)
+    """
+    def __init__(self, buckets:Tuple[float]):
+        self.buckets = buckets
+        # last one is +Inf
+        self.counts:List[int] = [ 0 ] * (len(buckets) + 1)
+        self.sum, self.count = 0.0, 0
+
+    def observe(self, seconds:float):
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+class Metrics:
+    """
+    Call counts, errors, in-flight gauges and latency histograms of Nodes and routes
+
+    latency is split in phases
+        - bridge: from Node-RED sent request to python received it
+        - queue: from received to function started(waiting workers, batch)
+        - exec: running function
+    """
+    def __init__(self, buckets:Tuple[float] = METRIC_BUCKETS):
+        """
+        Parameters
+        ----------
+        buckets: Tuple[float], default METRIC_BUCKETS
+            upper bounds(second) of latency buckets, ascending
+        """
+        self.buckets = tuple(buckets)
+        self.__lock = Lock()
+        # ( kind, name ): { calls, errors, busy, in_flight, histograms of phases }
+        self.__series:Dict[Tuple[str, str], dict] = {}
+
+    def __get(self, kind:str, name:str) -> dict:
+        series = self.__series.get(( kind, name ))
+        if series is None:
+            series = self.__series[( kind, name )] = {
+                "calls": 0, "errors": 0, "busy": 0, "in_flight": 0,
+                "latency": { phase: Histogram(self.buckets) for phase in PHASES }
+            }
+
+        return series
+
+    def enter(self, kind:Literal["node", "route"], name:str):
+        """
+        Count request accepted from bridge as in flight
+        """
+        with self.__lock:
+            self.__get(kind, name)["in_flight"] += 1
+
+    def exit(self, kind:Literal["node", "route"], name:str, state:Literal["success", "fail", "busy"]):
+        """
+        Count request finished(result sent) or refused(busy, retried by Node-RED side later)
+        """
+        with self.__lock:
+            series = self.__get(kind, name)
+            series["in_flight"] -= 1
+            if state == "busy":
+                series["busy"] += 1
+            else:
+                series["calls"] += 1
+                if state == "fail":
+                    series["errors"] += 1
+
+    def observe(self, kind:Literal["node", "route"], name:str, phase:Literal["bridge", "queue", "exec"], seconds:float):
+        """
+        Record latency of phase
+        """
+        with self.__lock:
+            self.__get(kind, name)["latency"][phase].observe(max(0.0, seconds))
+
+    def snapshot(self) -> List[dict]:
+        """
+        Copy of current metrics
+
+        Return
+        ------
+        series: List[dict]
+            list of { kind, name, calls, errors, busy, in_flight, latency: { phase: { buckets, counts, sum, count } } }
+            counts are not cumulative, last one is over the last bucket
+        """
+        with self.__lock:
+            return [
+                {
+                    "kind": kind, "name": name,
+                    "calls": series["calls"], "errors": series["errors"], "busy": series["busy"], "in_flight": series["in_flight"],
+                    "latency": {
+                        phase: { "buckets": list(histogram.buckets), "counts": list(histogram.counts), "sum": histogram.sum, "count": histogram.count }
+                        for phase, histogram in series["latency"].items()
+                    }
+                }
+                for ( kind, name ), series in self.__series.items()
+            ]
+
+    def clear(self):
+        """
+        Reset all metrics
+        """
+        with self.__lock:
+            self.__series.clear()
+
+    def to_prometheus(self) -> str:
+        """
+        Metrics in Prometheus text exposition format
+        """
+        lines = []
+        series_list = self.snapshot()
+
+        for metric, key, kind, help in (
+            ( "noderedpy_calls_total", "calls", "counter", "Finished calls of Node functions and routes" ),
+            ( "noderedpy_errors_total", "errors", "counter", "Failed calls of Node functions and routes" ),
+            ( "noderedpy_busy_total", "busy", "counter", "Requests refused by full queue, retried by Node-RED" ),
+            ( "noderedpy_in_flight", "in_flight", "gauge", "Requests accepted and not finished" )
+        ):
+            lines += [ f"# HELP {metric} {help}", f"# TYPE {metric} {kind}" ]
+            for series in series_list:
+                lines.append(f"{metric}{{{_labels(series)}}} {series[key]}")
+
+        lines += [
+            "# HELP noderedpy_latency_seconds Latency of Node functions and routes by phase(bridge, queue, exec)",
+            "# TYPE noderedpy_latency_seconds histogram"
+        ]
+        for series in series_list:
+            for phase, histogram in series["latency"].items():
+                labels, cumulative = f"{_labels(series)},phase=\"{phase}\"", 0
+                for bound, count in zip(histogram["buckets"] + [ "+Inf" ], histogram["counts"]):
+                    cumulative += count
+                    lines.append(f"noderedpy_latency_seconds_bucket{{{labels},le=\"{bound}\"}} {cumulative}")
+
+                lines.append(f"noderedpy_latency_seconds_sum{{{labels}}} {histogram['sum']}")
+                lines.append(f"noderedpy_latency_seconds_count{{{labels}}} {histogram['count']}")
+
+        return "\n".join(lines) + "\n"
+
+def _escape(value:str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _labels(series:dict) -> str:
+    return f"kind=\"{series['kind']}\",name=\"{_escape(series['name'])}\""
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+import time, traceback
+from types import MethodType
+from typing import List
+from threading import Thread, Condition
+
+
+class NodeBatcher:
+    """
+    Collects messages of Node and flushes them as one batch
+    when `batch_size` messages collected or `max_batch_wait_ms` passed from first message
+    """
+    def __init__(self, batch_size:int, max_batch_wait_ms:float, flush:MethodType, queue_size:int = 256):
+        """
+        Parameters
+        ----------
+        batch_size: int, required
+            max number of messages in one batch
+        max_batch_wait_ms: float, required
+            max time(ms) to wait more messages after first message of batch
+        flush: MethodType, required
+            function called with list of items, on thread of batcher
+        queue_size: int, default 256
+            number of messages can wait over `batch_size`, `add` refuses messages over this
+        """
+        if batch_size < 1:
+            raise ValueError("`batch_size` must be 1 or higher!")
+
+        self.batch_size, self.max_batch_wait, self.queue_size = batch_size, max_batch_wait_ms / 1000, queue_size
+        self.__flush = flush
+        self.__items:list = []
+        self.__deadline = 0.0
+        self.__condition = Condition()
+        self.__thread:Thread = None
+
+    def add(self, item:tuple) -> bool:
+        """
+        Add item to next batch
+
+        Return
+        ------
+        accepted: bool
+            False if too many items waiting
+        """
+        with self.__condition:
+            if self.__thread is None:
+                self.__thread = Thread(target = self.__work, daemon = True)
+                self.__thread.start()
+
+            if len(self.__items) >= self.batch_size + self.queue_size:
+                return False
+
+            if len(self.__items) == 0:
+                self.__deadline = time.monotonic() + self.max_batch_wait
+
+            self.__items.append(item)
+            self.__condition.notify()
+
+        return True
+
+    def __work(self):
+        while True:
+            with self.__condition:
+                while len(self.__items) == 0:
+                    self.__condition.wait()
+
+                # wait until batch filled or deadline of first item
+                while len(self.__items) < self.batch_size:
+                    remaining = self.__deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+
+                    self.__condition.wait(remaining)
+
+                batch:List[tuple] = self.__items[:self.batch_size]
+                self.__items = self.__items[self.batch_size:]
+                if len(self.__items) > 0:
+                    self.__deadline = time.monotonic() + self.max_batch_wait
+
+            try:
+                self.__flush(batch)
+            except:
+                traceback.print_exc()
@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
-import json
+from types import MethodType
 try:
     from typing import Literal
 except:
@@ -7,33 +7,33 @@ except:
 
 
 class NodeCommunicator:
-    def __init__(self, message_file:str, node_name:str):
-        self.__message_file, self.__node_name = message_file, node_name
+    def __init__(self, send:MethodType, node_name:str):
+        self.__send, self.__node_name = send, node_name
 
     def log(self, *args):
-        with open(self.__message_file, "w", encoding = "utf-8") as mfw:
-            json.dump({
-                "name": self.__node_name,
-                "log": args
-            }, mfw, indent = 4)
+        self.__send({
+            "type": "message",
+            "name": self.__node_name,
+            "log": args
+        })
 
     def warn(self, *args):
-        with open(self.__message_file, "w", encoding = "utf-8") as mfw:
-            json.dump({
-                "name": self.__node_name,
-                "warn": args
-            }, mfw, indent = 4)
+        self.__send({
+            "type": "message",
+            "name": self.__node_name,
+            "warn": args
+        })
 
     def error(self, *args):
-        with open(self.__message_file, "w", encoding = "utf-8") as mfw:
-            json.dump({
-                "name": self.__node_name,
-                "error": args
-            }, mfw, indent = 4)
+        self.__send({
+            "type": "message",
+            "name": self.__node_name,
+            "error": args
+        })
 
     def status(self, fill:Literal["red", "green", "yellow", "blue", "grey"], shape:Literal["ring", "dot"], text:str):
-        with open(self.__message_file, "w", encoding = "utf-8") as mfw:
-            json.dump({
-                "name": self.__node_name,
-                "status": { "fill": fill, "shape": shape, "text": text }
-            }, mfw, indent = 4)
+        self.__send({
+            "type": "message",
+            "name": self.__node_name,
+            "status": { "fill": fill, "shape": shape, "text": text }
+        })
@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+import sys, queue, pickle, traceback, itertools, multiprocessing, asyncio
+from types import MethodType
+from typing import List, Any
+from threading import Thread, Lock, Condition
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from .communicator import NodeCommunicator
+
+
+class NodeExecutor:
+    """
+    Bounded pool of worker threads to run node functions
+    """
+    def __init__(self, concurrency:int, queue_size:int):
+        """
+        Parameters
+        ----------
+        concurrency: int, required
+            number of worker threads
+        queue_size: int, required
+            number of jobs can wait for worker, `submit` refuses jobs over this
+        """
+        if concurrency < 1:
+            raise ValueError("`concurrency` must be 1 or higher!")
+
+        self.concurrency, self.queue_size = concurrency, queue_size
+        self.__queue = queue.Queue(maxsize = queue_size)
+        self.__workers:List[Thread] = []
+        self.__lock = Lock()
+        self.__stopped = False
+
+    def start(self):
+        """
+        Start workers, called on first job if not called
+        """
+        with self.__lock:
+            if len(self.__workers) == 0:
+                for _ in range(self.concurrency):
+                    worker = Thread(target = self.__work, daemon = True)
+                    worker.start()
+                    self.__workers.append(worker)
+
+    def submit(self, func:MethodType, *args) -> bool:
+        """
+        Queue job to run in worker
+
+        Return
+        ------
+        accepted: bool
+            False if queue is full, or stopped
+        """
+        if self.__stopped:
+            return False
+
+        self.start()
+
+        try:
+            self.__queue.put_nowait(( func, args ))
+            return True
+        except queue.Full:
+            return False
+
+    def shutdown(self):
+        """
+        Stop workers after running jobs, jobs not started are dropped
+        """
+        self.__stopped = True
+        with self.__lock:
+            # wake idle workers, busy ones see stopped after their jobs
+            for _ in self.__workers:
+                try:
+                    self.__queue.put_nowait(None)
+                except queue.Full:
+                    break
+
+    def __work(self):
+        while not self.__stopped:
+            job = self.__queue.get()
+            if job is None:
+                self.__queue.task_done()
+                break
+
+            func, args = job
+            try:
+                func(*args)
+            except:
+                traceback.print_exc()
+            finally:
+                self.__queue.task_done()
+
+    def call(self, node_func:MethodType, node_name:str, send:MethodType, *args) -> Any:
+        """
+        Call node function with ( NodeCommunicator, *args ), runs inside of worker
+        """
+        return node_func(NodeCommunicator(send, node_name), *args)
+
+
+# max seconds to wait messages of call forwarded after result
+FORWARD_TIMEOUT = 10
+
+# queue for messages of NodeCommunicator, set in worker process
+_worker_messages:multiprocessing.Queue = None
+
+def _init_worker(messages:multiprocessing.Queue):
+    global _worker_messages
+    _worker_messages = messages
+
+def _ping():
+    pass
+
+# memoryview(binary payload from bridge) cannot be pickled
+def _picklable(value:Any) -> Any:
+    if isinstance(value, memoryview):
+        return value.tobytes()
+    if isinstance(value, dict):
+        return { key: _picklable(item) for key, item in value.items() }
+    if isinstance(value, ( list, tuple )):
+        return type(value)(_picklable(item) for item in value)
+
+    return value
+
+# values cannot be pickled(ex: lock in args of log) are sent as str
+def _stringified(value:Any) -> Any:
+    try:
+        pickle.dumps(value)
+        return value
+    except Exception:
+        if isinstance(value, dict):
+            return { key: _stringified(item) for key, item in value.items() }
+        if isinstance(value, ( list, tuple )):
+            return type(value)(_stringified(item) for item in value)
+
+        return str(value)
+
+def _call_in_worker(node_func:MethodType, node_name:str, call_id:int, *args) -> tuple:
+    count = itertools.count()
+
+    def send(frame:dict):
+        # pickled here, queue pickles on feeder thread and drops frames failed
+        try:
+            data = pickle.dumps(frame)
+        except Exception:
+            data = pickle.dumps(_stringified(frame))
+
+        _worker_messages.put(( call_id, data ))
+        next(count)
+
+    result = node_func(NodeCommunicator(send, node_name), *args)
+    return result, next(count)
+
+class ProcessNodeExecutor(NodeExecutor):
+    """
+    Bounded pool which runs node functions in worker processes started with RED
+
+    node function must be importable(defined at module level), worker imports its module once
+    workers are spawned(forkserver on POSIX), not forked from threads of RED, so main script must start RED under `if __name__ == "__main__":`
+    messages of NodeCommunicator are forwarded from workers, pool is recreated when worker died
+    """
+    def __init__(self, concurrency:int, queue_size:int):
+        super().__init__(concurrency, queue_size)
+
+        self.__context = multiprocessing.get_context("spawn" if sys.platform == "win32" else "forkserver")
+        self.__messages = self.__context.Queue()
+        self.__pool:ProcessPoolExecutor = None
+        self.__pool_lock = Lock()
+        self.__stopped = False
+        # call id: [ send, count of forwarded messages ]
+        self.__calls = {}
+        self.__call_ids = itertools.count()
+        self.__forwarded = Condition()
+
+    def start(self):
+        super().start()
+
+        with self.__pool_lock:
+            if self.__pool is None and not self.__stopped:
+                self.__pool = self.__create_pool()
+                Thread(target = self.__forward, daemon = True).start()
+
+    def __create_pool(self) -> ProcessPoolExecutor:
+        pool = ProcessPoolExecutor(max_workers = self.concurrency, mp_context = self.__context, initializer = _init_worker, initargs = ( self.__messages, ))
+        # start all workers now, not on first messages
+        wait([ pool.submit(_ping) for _ in range(self.concurrency) ])
+
+        return pool
+
+    # replace pool broken by died worker, once for calls failed together
+    def __restart(self, broken:ProcessPoolExecutor):
+        with self.__pool_lock:
+            if self.__pool is broken and not self.__stopped:
+                broken.shutdown(wait = False)
+                self.__pool = self.__create_pool()
+
+    def shutdown(self):
+        """
+        Stop worker processes and threads after running jobs, for replaced Node functions and stop of RED
+        """
+        super().shutdown()
+
+        with self.__pool_lock:
+            if self.__stopped:
+                return
+
+            self.__stopped = True
+            if self.__pool is not None:
+                self.__pool.shutdown(wait = False)
+                self.__stop_forward()
+
+    # stop forwarder after messages of running calls, by last one of them
+    def __stop_forward(self):
+        with self.__forwarded:
+            if self.__stopped and len(self.__calls) == 0:
+                self.__messages.put(None)
+
+    def __forward(self):
+        while True:
+            item = self.__messages.get()
+            if item is None:
+                break
+
+            call_id, data = item
+            with self.__forwarded:
+                call = self.__calls.get(call_id)
+                if call is not None:
+                    try:
+                        call[0](pickle.loads(data))
+                    except:
+                        traceback.print_exc()
+
+                    call[1] += 1
+                    self.__forwarded.notify_all()
+
+    def call(self, node_func:MethodType, node_name:str, send:MethodType, *args) -> Any:
+        call_id = next(self.__call_ids)
+        with self.__forwarded:
+            self.__calls[call_id] = [ send, 0 ]
+
+        pool = self.__pool
+        try:
+            result, message_count = pool.submit(_call_in_worker, node_func, node_name, call_id, *_picklable(args)).result()
+
+            # send result after all messages of call
+            with self.__forwarded:
+                self.__forwarded.wait_for(lambda: self.__calls[call_id][1] >= message_count, FORWARD_TIMEOUT)
+
+            return result
+        except BrokenProcessPool:
+            # this call fails, next calls run on new pool
+            self.__restart(pool)
+            raise
+        finally:
+            with self.__forwarded:
+                del self.__calls[call_id]
+
+            self.__stop_forward()
+
+
+class AsyncNodeExecutor:
+    """
+    Bounded runner of coroutine node functions on event loop of RED
+    """
+    def __init__(self, loop:asyncio.AbstractEventLoop, concurrency:int = 1024, queue_size:int = 256):
+        """
+        Parameters
+        ----------
+        loop: AbstractEventLoop, required
+            event loop to run coroutines
+        concurrency: int, default 1024
+            number of coroutines running at once
+        queue_size: int, default 256
+            number of coroutines can wait for others, `submit` refuses jobs over this
+        """
+        if concurrency < 1:
+            raise ValueError("`concurrency` must be 1 or higher!")
+
+        self.loop, self.concurrency, self.queue_size = loop, concurrency, queue_size
+        self.__in_flight = 0
+        self.__lock = Lock()
+        self.__semaphore:asyncio.Semaphore = None
+
+    def start(self):
+        pass
+
+    def shutdown(self):
+        pass
+
+    def submit(self, coro_func:MethodType, *args) -> bool:
+        """
+        Schedule coroutine function to event loop, can be called from any thread
+
+        Return
+        ------
+        accepted: bool
+            False if too many coroutines waiting
+        """
+        with self.__lock:
+            if self.__in_flight >= self.concurrency + self.queue_size:
+                return False
+
+            self.__in_flight += 1
+
+        asyncio.run_coroutine_threadsafe(self.__guard(coro_func, args), self.loop)
+        return True
+
+    async def __guard(self, coro_func:MethodType, args:tuple):
+        # create on loop, semaphore binds loop on python < 3.10
+        if self.__semaphore is None:
+            self.__semaphore = asyncio.Semaphore(self.concurrency)
+
+        try:
+            async with self.__semaphore:
+                await coro_func(*args)
+        except:
+            traceback.print_exc()
+        finally:
+            with self.__lock:
+                self.__in_flight -= 1
+
+    async def call(self, node_func:MethodType, node_name:str, send:MethodType, *args) -> Any:
+        """
+        Await node function with ( NodeCommunicator, *args ), runs on event loop
+        """
+        return await node_func(NodeCommunicator(send, node_name), *args)
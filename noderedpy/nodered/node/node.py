@@ -1,20 +1,68 @@
 # -*- coding: utf-8 -*-
-import os, htmlgenerator as hg, gc, json, traceback
+import os, htmlgenerator as hg, traceback, asyncio, json, hashlib, time
+from glob import glob
+from functools import lru_cache
 from types import MethodType
-from typing import List
-from threading import Thread
+from typing import List, Union
+try:
+    from typing import Literal
+except:
+    from typing_extensions import Literal
+
 from ..red.editor.widget import Widget
 from ..red.editor.editor import Editor
-from .communicator import NodeCommunicator
+from .executor import NodeExecutor, AsyncNodeExecutor
+from .batcher import NodeBatcher
+from ..metrics import Metrics
+from ..tracer import record_span
 from ...templates.package import package_json
 from ...templates.html import node_html
 from ...templates.javascript import node_js
 from .. import __path__
 
 
+def _write_if_changed(file:os.PathLike, content:str) -> bool:
+    if os.path.exists(file):
+        with open(file, "r", encoding = "utf-8") as fr:
+            if fr.read() == content:
+                return False
+
+    with open(file, "w", encoding = "utf-8") as fw:
+        fw.write(content)
+
+    return True
+
+# file in generated package, hash of inputs and props map
+STAMP_FILE = ".nodered-py-stamp.json"
+
+# describe value(widgets, ...) with plain values, for stamp of package
+def _describe(value):
+    if isinstance(value, ( list, tuple )):
+        return [ _describe(item) for item in value ]
+    if isinstance(value, dict):
+        return { str(key): _describe(item) for key, item in value.items() }
+    if hasattr(value, "__dict__") and not callable(value):
+        return dict(
+            { key: _describe(item) for key, item in vars(value).items() },
+            __type__ = f"{type(value).__module__}.{type(value).__qualname__}"
+        )
+
+    return value
+
+# sources which generate packages, changed sources make all packages stale
+@lru_cache(maxsize = None)
+def _template_version() -> str:
+    root = os.path.dirname(__path__[0])
+    sha = hashlib.sha256()
+    for pattern in ( ( "templates", "*.py" ), ( "nodered", "red", "editor", "**", "*.py" ), ( "nodered", "node", "properties", "*.py" ) ):
+        for source in sorted(glob(os.path.join(root, *pattern), recursive = True)):
+            with open(source, "rb") as sr:
+                sha.update(sr.read())
+
+    return sha.hexdigest()
 
 class Node:
-    def __init__(self, name:str, category:str, version:str, description:str, author:str, keywords:List[str], icon:str, color:str, widgets:List[Widget], node_func:MethodType):
+    def __init__(self, name:str, category:str, version:str, description:str, author:str, keywords:List[str], icon:str, color:str, widgets:List[Widget], node_func:MethodType, concurrency:int = None, executor:Literal["thread", "process"] = "thread", batch_size:int = None, max_batch_wait_ms:float = 5):
         # name of node cannot contain spaces
         if " " in name.strip():
             raise NameError("Node name cannot contain spaces!")
@@ -33,71 +81,288 @@ class Node:
         self.name, self.category, self.version, self.description, self.author, self.icon, self.color, self.editor =\
             name, category, version, description, author, icon, color, Editor(widgets)
 
-        self.__node_func = node_func
+        if not executor in ( "thread", "process" ):
+            raise ValueError("`executor` must be one of 'thread', 'process'!")
+
+        self.__node_func, self.concurrency, self.executor_type = node_func, concurrency, executor
+        self.is_async = asyncio.iscoroutinefunction(node_func)
+        if self.is_async and executor == "process":
+            raise ValueError("`async def` Node function cannot run in 'process' executor!")
+
+        # set by RED when started
+        self.executor:Union[NodeExecutor, AsyncNodeExecutor] = None
+        self.metrics:Metrics = None
+        # ProfileSession while profiling, see `Profiler`
+        self.profile = None
+        # set by `create`(or rendered on first use)
+        self.__props_map:dict = None
+        self.batch_size = batch_size
+        # queue_size is set to that of RED when started
+        self.__batcher = None if batch_size is None else NodeBatcher(batch_size, max_batch_wait_ms, self.__flush_batch)
+
+    @property
+    def node_func(self) -> MethodType:
+        """
+        function registered as Node
+        """
+        return self.__node_func
+
+    @property
+    def batcher(self) -> NodeBatcher:
+        """
+        batcher of messages, None if `batch_size` not set
+        """
+        return self.__batcher
+
+    @property
+    def package_name(self) -> str:
+        """
+        name of generated Node-RED package
+        """
+        return self.name if self.name.startswith("nodered-py-") else f"nodered-py-{self.name}"
+
+    def create(self, node_red_user_dir:str, bridge_module:str) -> bool:
+        """
+        Generate Node-RED package of Node
 
-    def create(self, node_red_user_dir:str, node_red_user_cache_dir:str):
-        self.__communicator = NodeCommunicator(os.path.join(node_red_user_cache_dir, "node_message.json"), self.name)
-        node_dir = os.path.join(node_red_user_dir, "node_modules", self.name if self.name.startswith("nodered-py-") else f"nodered-py-{self.name}")
-        os.makedirs(os.path.join(node_dir, "lib"))
+        package is stamped with hash of its inputs, unchanged package is not rendered again
+        and files not changed are not written
+
+        Return
+        ------
+        changed: bool
+            True if any file of package written
+        """
+        node_dir = os.path.join(node_red_user_dir, "node_modules", self.package_name)
+        stamp_file = os.path.join(node_dir, STAMP_FILE)
+
+        stamp = self.__stamp(bridge_module)
+        if os.path.exists(stamp_file):
+            try:
+                with open(stamp_file, "r", encoding = "utf-8") as sfr:
+                    stamped = json.load(sfr)
+
+                if stamped["hash"] == stamp:
+                    self.__props_map = stamped["props_map"]
+                    return False
+            except ( ValueError, KeyError ):
+                pass
+
+        os.makedirs(os.path.join(node_dir, "lib"), exist_ok = True)
 
         # render editor
         rendered_editor = self.editor.render()
         self.__props_map = rendered_editor.props_map
 
+        changed = False
+
         # write package.json
-        with open(os.path.join(node_dir, "package.json"), "w", encoding = "utf-8") as pjw:
-            pjw.write(package_json(self.name, self.version, self.description, self.author, self.keywords))
+        changed |= _write_if_changed(
+            os.path.join(node_dir, "package.json"),
+            package_json(self.name, self.version, self.description, self.author, self.keywords)
+        )
 
         # write html
-        with open(os.path.join(node_dir, "lib", f"{self.name}.html"), "w", encoding = "utf-8") as nhw:
-            nhw.write(node_html(
+        changed |= _write_if_changed(
+            os.path.join(node_dir, "lib", f"{self.name}.html"),
+            node_html(
                 self.name, self.icon, self.category, self.color,
                 "\n".join([ hg.render(element, {}) for element in rendered_editor.elements ]),
                 rendered_editor.props,
                 rendered_editor.prepare, rendered_editor.cancel, rendered_editor.save
-            ))
+            )
+        )
 
         # write javascript
-        with open(os.path.join(node_dir, "lib", f"{self.name}.js"), "w", encoding = "utf-8") as njw:
-            njw.write(node_js(self.name, [ name for name in rendered_editor.props.keys() if not name == "np-var_name" ], node_red_user_cache_dir))
+        changed |= _write_if_changed(
+            os.path.join(node_dir, "lib", f"{self.name}.js"),
+            node_js(self.name, [ name for name in rendered_editor.props.keys() if not name == "np-var_name" ], bridge_module)
+        )
+
+        # stamp after files written, so broken package is generated again
+        with open(stamp_file, "w", encoding = "utf-8") as sfw:
+            json.dump({ "hash": stamp, "props_map": self.__props_map }, sfw)
+
+        return changed
+
+    # hash of all inputs of package
+    def __stamp(self, bridge_module:str) -> str:
+        return hashlib.sha256(json.dumps({
+            "name": self.name, "category": self.category, "version": self.version,
+            "description": self.description, "author": self.author, "keywords": self.keywords,
+            "icon": self.icon, "color": self.color, "editor": _describe(self.editor),
+            "bridge_module": bridge_module, "template": _template_version()
+        }, sort_keys = True, default = repr).encode("utf-8")).hexdigest()
+
+    @property
+    def default_props(self) -> dict:
+        """
+        props sent by Node-RED when all properties are default(by variable name, before `map_props`)
+        """
+        return {
+            var_name[len("np-var_"):]: info["value"]
+            for var_name, info in self.editor.render().props.items()
+            if not var_name == "np-var_name"
+        }
+
+    def map_props(self, raw_props:dict) -> dict:
+        """
+        Map props sent by Node-RED(by variable name) to props of Node function
+        """
+        if self.__props_map is None:
+            self.__props_map = self.editor.render().props_map
+
+        props = {}
+        for name, map_info in self.__props_map.items():
+            if not name == "name":
+                if isinstance(map_info, list):
+                    props[name] = [
+                        raw_props[var_name]
+                        for var_name in map_info
+                    ]
+                elif isinstance(map_info, dict):
+                    props[name] = {
+                        key: raw_props[var_name]
+                        for key, var_name in map_info.items()
+                    }
+                else:
+                    props[name] = raw_props[map_info]
+
+        return props
+
+    def __respond(self, resp:dict, send:MethodType):
+        try:
+            send(resp)
+        except ( TypeError, ValueError ):
+            # error of returned msg(ex: NaN), not of retry below
+            message = traceback.format_exc()
+            # body of http request may not serializable
+            try:
+                resp["msg"]["req"]["body"] = {}
+                send(resp)
+            except:
+                send({ "type": "result", "state": "fail", "name": self.name, "message": message })
+
+    # record latency of phase from `since`(and span of sampled requests), returns now
+    def __observe(self, phase:str, since:float, *sends:MethodType) -> float:
+        now = time.perf_counter()
+        if self.metrics is not None:
+            self.metrics.observe("node", self.name, phase, now - since)
+
+        for send in sends:
+            record_span(send, phase, now - since)
+
+        return now
 
-    def __run(self, raw_props:dict, msg:dict, output_file:str):
-        gc.enable()
+    # Node function, wrapped while profiling
+    def __target(self) -> MethodType:
+        profile = self.profile
+        return self.__node_func if profile is None else profile.wrap(self.__node_func)
 
+    def __run(self, raw_props:dict, msg:dict, send:MethodType, queued:float):
+        started = self.__observe("queue", queued, send)
         print(f"\n{self.name} started\n===================================")
         try:
-            props = {}
-            for name, map_info in self.__props_map.items():
-                if not name == "name":
-                    if isinstance(map_info, list):
-                        props[name] = [
-                            raw_props[var_name]
-                            for var_name in map_info
-                        ]
-                    elif isinstance(map_info, dict):
-                        props[name] = {
-                            key: raw_props[var_name]
-                            for key, var_name in map_info.items()
-                        }
-                    else:
-                        props[name] = raw_props[map_info]
-
-            resp = self.__node_func(self.__communicator, props, msg)
-            del props
+            resp = {
+                "type": "result", "state": "success", "name": self.name,
+                "msg": self.executor.call(self.__target(), self.name, send, self.map_props(raw_props), msg)
+            }
             print("============================= ended\n")
+        except:
+            resp = { "type": "result", "state": "fail", "name": self.name, "message": traceback.format_exc() }
+
+        self.__observe("exec", started, send)
+        self.__respond(resp, send)
 
-            resp.update({ "state": "success", "name": self.name })
-            gc.collect()
+    # for `async def` node function, runs on event loop
+    async def __run_async(self, raw_props:dict, msg:dict, send:MethodType, queued:float):
+        started = self.__observe("queue", queued, send)
+        print(f"\n{self.name} started\n===================================")
+        try:
+            resp = {
+                "type": "result", "state": "success", "name": self.name,
+                "msg": await self.executor.call(self.__target(), self.name, send, self.map_props(raw_props), msg)
+            }
+            print("============================= ended\n")
         except:
-            resp = { "state": "fail", "name": self.name, "message": traceback.format_exc() }
+            resp = { "type": "result", "state": "fail", "name": self.name, "message": traceback.format_exc() }
+
+        self.__observe("exec", started, send)
+        self.__respond(resp, send)
+
+    # build result of each message from returned list of batch
+    def __respond_batch(self, items:List[tuple], results:list):
+        if not isinstance(results, list) or len(results) != len(items):
+            raise ValueError(f"batch function must return list of {len(items)} messages!")
+
+        for ( _, _, send ), result in zip(items, results):
+            self.__respond({ "type": "result", "state": "success", "name": self.name, "msg": result }, send)
+
+    def __fail_batch(self, items:List[tuple]):
+        message = traceback.format_exc()
+        for _, _, send in items:
+            send({ "type": "result", "state": "fail", "name": self.name, "message": message })
+
+    def __batch_args(self, items:List[tuple]) -> tuple:
+        # status goes to all messages of batch, log, warn, error only once(with first message)
+        def send_all(frame:dict):
+            if "status" in frame:
+                for _, _, send in items:
+                    send(frame)
+            else:
+                items[0][2](frame)
 
+        return send_all, [ ( self.map_props(raw_props), msg ) for raw_props, msg, _ in items ]
+
+    def __run_batch(self, items:List[tuple], queued:float):
+        started = self.__observe("queue", queued, *[ send for _, _, send in items ])
+        print(f"\n{self.name} started(batch of {len(items)})\n===================================")
         try:
-            with open(output_file, "w", encoding = "utf-8") as ofw:
-                json.dump(resp, ofw, indent = 4)
+            send_all, batch = self.__batch_args(items)
+            try:
+                results = self.executor.call(self.__target(), self.name, send_all, batch)
+            finally:
+                self.__observe("exec", started, *[ send for _, _, send in items ])
+
+            print("============================= ended\n")
+
+            self.__respond_batch(items, results)
         except:
-            os.remove(output_file)
-            resp["req"]["body"] = {}
-            self.__write_node_output(output_file, resp)
+            self.__fail_batch(items)
+
+    async def __run_batch_async(self, items:List[tuple], queued:float):
+        started = self.__observe("queue", queued, *[ send for _, _, send in items ])
+        print(f"\n{self.name} started(batch of {len(items)})\n===================================")
+        try:
+            send_all, batch = self.__batch_args(items)
+            try:
+                results = await self.executor.call(self.__target(), self.name, send_all, batch)
+            finally:
+                self.__observe("exec", started, *[ send for _, _, send in items ])
+
+            print("============================= ended\n")
+
+            self.__respond_batch(items, results)
+        except:
+            self.__fail_batch(items)
+
+    def __flush_batch(self, items:List[tuple]):
+        # queue wait of batch is from flushed
+        if not self.executor.submit(self.__run_batch_async if self.is_async else self.__run_batch, items, time.perf_counter()):
+            # queue is full, Node-RED side retries later
+            for _, _, send in items:
+                send({ "type": "busy" })
+
+    def run(self, raw_props:dict, msg:dict, send:MethodType) -> bool:
+        """
+        Queue node function to executor(or next batch)
+
+        Return
+        ------
+        accepted: bool
+            False if queue of executor is full
+        """
+        if self.__batcher is not None:
+            return self.__batcher.add(( raw_props, msg, send ))
 
-    def run(self, raw_props:dict, msg:dict, output_file:str):
-        Thread(target = self.__run, args = ( raw_props, msg, output_file ), daemon = True).start()
+        return self.executor.submit(self.__run_async if self.is_async else self.__run, raw_props, msg, send, time.perf_counter())
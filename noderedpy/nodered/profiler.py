@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+import io, os, sys, time, pstats, cProfile, asyncio, threading
+from collections import Counter
+from types import MethodType
+from typing import Union
+from threading import Thread, Event, Lock
+try:
+    from typing import Literal
+except:
+    from typing_extensions import Literal
+
+from .registry import Registry
+
+
+# max seconds to wait calls, when only `calls` given
+PROFILE_TIMEOUT = 300
+# interval(second) of sampling profiler
+SAMPLE_INTERVAL = 0.001
+
+# switch interval of interpreter is lowered while any sampling session running, original restored by last one
+_switch_lock, _switch_sessions, _switch_interval = Lock(), 0, None
+
+def _lower_switch_interval(interval:float):
+    global _switch_sessions, _switch_interval
+    with _switch_lock:
+        if _switch_sessions == 0:
+            _switch_interval = sys.getswitchinterval()
+
+        _switch_sessions += 1
+        sys.setswitchinterval(min(sys.getswitchinterval(), interval))
+
+def _restore_switch_interval():
+    global _switch_sessions
+    with _switch_lock:
+        _switch_sessions -= 1
+        if _switch_sessions == 0:
+            sys.setswitchinterval(_switch_interval)
+
+class ProfileSession:
+    """
+    Profile of calls of one Node function or route, attached as `profile` of Node(or Route) while running
+
+    modes
+        - cprofile: deterministic profile of each call(cProfile), reported as pstats
+          one call at a time(cProfile is one per process on python 3.12+), calls overlapping profiled one are not profiled
+          (but functions of other threads running meanwhile are included on python 3.12+)
+        - sampling: stacks of calls sampled every `interval`, reported as collapsed stacks(flamegraph.pl, speedscope)
+    """
+    def __init__(self, mode:Literal["cprofile", "sampling"] = "cprofile", calls:int = None, interval:float = SAMPLE_INTERVAL):
+        """
+        Parameters
+        ----------
+        mode: str, default cprofile
+            options: cprofile, sampling
+        calls: int, default None
+            number of calls to profile, unlimited if None
+        interval: float, default 0.001
+            interval(second) of sampling
+        """
+        if not mode in ( "cprofile", "sampling" ):
+            raise ValueError("`mode` must be one of 'cprofile', 'sampling'!")
+
+        self.mode, self.calls, self.interval = mode, calls, interval
+        self.count, self.started, self.seconds = 0, time.monotonic(), 0.0
+        self.__lock, self.__profiling = Lock(), Lock()
+        self.__done, self.__stopped = Event(), Event()
+        self.__stats = pstats.Stats()
+        # sampling: calls running on each thread, code of wrappers(root of sampled stacks), counts of stacks
+        self.__threads:Counter = Counter()
+        self.__wrappers = set()
+        self.__stacks:Counter = Counter()
+
+        if mode == "sampling":
+            # sampler needs GIL while calls running, switch thread as often as sampling
+            _lower_switch_interval(interval)
+            Thread(target = self.__sample, daemon = True).start()
+
+    def wrap(self, func:MethodType) -> MethodType:
+        """
+        Wrap function to profile its call
+        """
+        if asyncio.iscoroutinefunction(func):
+            async def profiled_async(*args):
+                profile = self.__enter()
+                try:
+                    return await func(*args)
+                finally:
+                    self.__exit(profile)
+
+            self.__wrappers.add(profiled_async.__code__)
+            return profiled_async
+
+        def profiled(*args):
+            profile = self.__enter()
+            try:
+                return func(*args)
+            finally:
+                self.__exit(profile)
+
+        self.__wrappers.add(profiled.__code__)
+        return profiled
+
+    # returns profile of call(cprofile), None(sampling) or False(not profiled)
+    def __enter(self) -> Union[cProfile.Profile, None, bool]:
+        if self.mode == "sampling":
+            with self.__lock:
+                self.__threads[threading.get_ident()] += 1
+
+            return None
+
+        if not self.__profiling.acquire(blocking = False):
+            return False
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # other profiling tool is active
+            self.__profiling.release()
+            return False
+
+        return profile
+
+    def __exit(self, profile:Union[cProfile.Profile, None, bool]):
+        if profile is False:
+            return
+
+        if profile is not None:
+            profile.disable()
+            self.__profiling.release()
+
+        with self.__lock:
+            if profile is None:
+                ident = threading.get_ident()
+                self.__threads[ident] -= 1
+                if self.__threads[ident] <= 0:
+                    del self.__threads[ident]
+
+            if self.__stopped.is_set():
+                return
+
+            if profile is not None:
+                self.__stats.add(profile)
+
+            self.count += 1
+            if self.calls is not None and self.count >= self.calls:
+                self.__done.set()
+
+    def __sample(self):
+        while not self.__stopped.wait(self.interval):
+            frames = sys._current_frames()
+            with self.__lock:
+                idents = list(self.__threads)
+
+            for ident in idents:
+                stack, frame = [], frames.get(ident)
+                # from running frame to wrapper, other frames are runtime of nodered.py
+                while frame is not None and not frame.f_code in self.__wrappers:
+                    stack.append(f"{frame.f_code.co_name} ({os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_firstlineno})")
+                    frame = frame.f_back
+
+                # async call is not running(awaiting) when wrapper not found
+                if frame is not None and len(stack) > 0:
+                    with self.__lock:
+                        self.__stacks[";".join(reversed(stack))] += 1
+
+    def wait(self, timeout:float) -> bool:
+        """
+        Wait `calls` profiled, returns False if timed out
+        """
+        return self.__done.wait(timeout)
+
+    def stop(self):
+        """
+        Stop profiling, calls finished after this are not reported
+        """
+        with self.__lock:
+            if self.mode == "sampling" and not self.__stopped.is_set():
+                _restore_switch_interval()
+
+            self.__stopped.set()
+            self.seconds = time.monotonic() - self.started
+
+    def report(self, sort:str = "cumulative", limit:int = 50) -> str:
+        """
+        Report of profiled calls, pstats text(cprofile) or collapsed stacks(sampling, "frame;frame;... count" lines)
+        calls shorter than `interval` may not be sampled, empty for sampling if no stack sampled
+
+        Parameters
+        ----------
+        sort: str, default cumulative
+            sort key of pstats(cprofile only)
+        limit: int, default 50
+            number of functions in pstats(cprofile only)
+        """
+        if self.mode == "sampling":
+            return "".join(f"{stack} {count}\n" for stack, count in self.__stacks.most_common())
+
+        stream = io.StringIO()
+        stream.write(f"{self.count} calls profiled in {self.seconds:.3f} seconds\n")
+        if self.count > 0:
+            self.__stats.stream = stream
+            self.__stats.sort_stats(sort).print_stats(limit)
+
+        return stream.getvalue()
+
+class Profiler:
+    """
+    Profiles Node functions and routes of registry on demand, costs one attribute check per call when not profiling
+    """
+    def __init__(self, registry:Registry):
+        self.registry = registry
+
+    def profile(self, kind:Literal["node", "route"], name:str, calls:int = None, seconds:float = None, mode:Literal["cprofile", "sampling"] = "cprofile", sort:str = "cumulative", limit:int = 50) -> str:
+        """
+        Profile calls of Node function or route until `calls` profiled or `seconds` passed, blocks until finished
+
+        Parameters
+        ----------
+        kind: str, required
+            options: node, route
+        name: str, required
+            name of Node, or "{method} {url}" of route(ex: "get /api")
+        calls: int, default None
+            number of calls to profile
+        seconds: float, default None
+            seconds to profile(if `calls` set too, finished by first one)
+            at least one of `calls`, `seconds` must be set, waits `calls` up to 300 seconds if only `calls` set
+        mode: str, default cprofile
+            options: cprofile(pstats), sampling(collapsed stacks for flamegraph)
+            `async def` functions include other coroutines run while awaiting in cprofile mode
+
+        Return
+        ------
+        report: str
+            see `ProfileSession.report`
+        """
+        if calls is None and seconds is None:
+            raise ValueError("`calls` or `seconds` must be set!")
+
+        if kind == "node":
+            target = self.registry.get_node(name)
+            if target is not None and target.executor_type == "process":
+                raise ValueError(f"Node `{name}` runs in 'process' executor, cannot be profiled!")
+        elif kind == "route":
+            target = self.registry.get_route(*name.split(" ", 1)) if " " in name else None
+        else:
+            raise ValueError("`kind` must be one of 'node', 'route'!")
+
+        if target is None:
+            raise ValueError(f"{kind} `{name}` is not registered!")
+
+        if target.profile is not None:
+            raise RuntimeError(f"{kind} `{name}` is already profiling!")
+
+        session = target.profile = ProfileSession(mode, calls)
+        try:
+            session.wait(PROFILE_TIMEOUT if seconds is None else seconds)
+        finally:
+            target.profile = None
+            session.stop()
+
+        return session.report(sort, limit)
@@ -1,5 +1,10 @@
 # -*- coding: utf-8 -*-
 from typing import List
+try:
+    from typing import Literal
+except:
+    from typing_extensions import Literal
+
 from .red import RED
 
 
@@ -17,6 +22,14 @@ class REDBuilder:
         self.__remote_access:bool = True
         self.__default_categories:List[str] = [ "subflows", "common", "function", "network", "sequence", "parser", "storage" ]
         self.__node_globals:dict = {}
+        self.__bridge_mode:str = "socket"
+        self.__concurrency:int = None
+        self.__queue_size:int = 256
+        self.__codec:str = "json"
+        self.__npm_install:str = "auto"
+        self.__metrics_url:str = None
+        self.__trace_rate:float = 0.0
+        self.__profile_url:str = None
 
     def set_user_dir(self, user_dir:str) -> "REDBuilder":
         """
@@ -163,6 +176,124 @@ class REDBuilder:
         self.__node_globals = node_globals
         return self
     
+    def set_bridge_mode(self, bridge_mode:Literal["socket", "file"]) -> "REDBuilder":
+        """
+        Function to set bridge_mode
+
+        Parameters
+        ----------
+        bridge_mode: str
+            channel for messages between Node-RED and python
+            options: socket, file
+
+        Return
+        ------
+        builder:REDBuilder
+        """
+        self.__bridge_mode = bridge_mode
+        return self
+
+    def set_concurrency(self, concurrency:int, queue_size:int = 256) -> "REDBuilder":
+        """
+        Function to set concurrency, queue_size
+
+        Parameters
+        ----------
+        concurrency: int
+            number of shared workers to run Node functions
+        queue_size: int, default 256
+            number of messages can wait for workers
+            when full, Node-RED side waits and retries
+
+        Return
+        ------
+        builder:REDBuilder
+        """
+        self.__concurrency, self.__queue_size = concurrency, queue_size
+        return self
+
+    def set_codec(self, codec:Literal["json", "orjson", "msgpack"]) -> "REDBuilder":
+        """
+        Function to set codec
+
+        Parameters
+        ----------
+        codec: str
+            serializer of messages between Node-RED and python
+            options: json, orjson(`pip install orjson`), msgpack(`pip install msgpack`)
+
+        Return
+        ------
+        builder:REDBuilder
+        """
+        self.__codec = codec
+        return self
+
+    def set_npm_install(self, npm_install:Literal["auto", "always", "never"]) -> "REDBuilder":
+        """
+        Function to set npm_install
+
+        Parameters
+        ----------
+        npm_install: str
+            run `npm install` in node_red_dir or not
+            options: auto(only when package.json or lockfile changed from last install), always, never
+
+        Return
+        ------
+        builder:REDBuilder
+        """
+        self.__npm_install = npm_install
+        return self
+
+    def set_metrics_url(self, metrics_url:str) -> "REDBuilder":
+        """
+        Function to set metrics_url
+
+        Parameters
+        ----------
+        metrics_url: str
+            url to serve metrics(call counts, errors, in-flight, latency histograms) in Prometheus text format
+
+        Return
+        ------
+        builder:REDBuilder
+        """
+        self.__metrics_url = metrics_url
+        return self
+
+    def set_trace_rate(self, trace_rate:float) -> "REDBuilder":
+        """
+        Function to set trace_rate
+
+        Parameters
+        ----------
+        trace_rate: float
+            ratio of messages to trace spans of each hop, 0.0 ~ 1.0
+
+        Return
+        ------
+        builder:REDBuilder
+        """
+        self.__trace_rate = trace_rate
+        return self
+
+    def set_profile_url(self, profile_url:str) -> "REDBuilder":
+        """
+        Function to set profile_url
+
+        Parameters
+        ----------
+        profile_url: str
+            url to profile Node or route on demand(POST under admin_root, needs adminAuth if set)
+
+        Return
+        ------
+        builder:REDBuilder
+        """
+        self.__profile_url = profile_url
+        return self
+
     def build(self) -> RED:
         """
         Function to create RED from setups
@@ -178,5 +309,8 @@ class REDBuilder:
         return RED(
             self.__user_dir, self.__node_red_dir,
             self.__admin_root, self.__node_root, self.__port, self.__default_flow,
-            self.__remote_access, self.__default_categories, self.__node_globals
+            self.__remote_access, self.__default_categories, self.__node_globals,
+            self.__bridge_mode, self.__concurrency, self.__queue_size, self.__codec,
+            self.__npm_install, self.__metrics_url, self.__trace_rate,
+            self.__profile_url
         )
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+from threading import Thread
+
+
+class REDHandle:
+    """
+    Handle of Node-RED server started with `RED.start(block = False)`
+    """
+    def __init__(self, red, thread:Thread):
+        self.red = red
+        self.__thread = thread
+
+    @property
+    def running(self) -> bool:
+        """
+        serving or not
+        """
+        return self.__thread.is_alive()
+
+    def wait(self, timeout:float = None) -> bool:
+        """
+        Wait until serving ends(stopped, or Node-RED exited without supervise)
+
+        Parameters
+        ----------
+        timeout: float, default None
+            seconds to wait, wait forever if None
+
+        Return
+        ------
+        ended: bool
+            False if timeout
+        """
+        self.__thread.join(timeout)
+        return not self.__thread.is_alive()
+
+    def stop(self, timeout:float = 5, drain_timeout:float = 10):
+        """
+        Stop Node-RED server(see `RED.stop`) and wait until serving ends
+
+        Parameters
+        ----------
+        timeout: float, default 5
+            seconds to wait Node-RED closes flows, killed after this
+        drain_timeout: float, default 10
+            seconds to wait messages in flight, stopped without waiting others after this
+        """
+        self.red.stop(timeout, drain_timeout)
+        self.__thread.join()
@@ -1,29 +1,51 @@
 # -*- coding: utf-8 -*-
-import os, sys, subprocess, json, shutil
+import os, sys, subprocess, json, shutil, asyncio, traceback, hashlib, time
 from glob import glob
-from typing import List, Union
+from collections import deque
+from threading import Thread, Event
+from concurrent.futures import Future
+from typing import List, Union, Optional, TYPE_CHECKING
 try:
     from typing import Literal
 except:
     from typing_extensions import Literal
 
+if TYPE_CHECKING:
+    # imported lazily where used
+    import psutil
+
 from types import MethodType
 from ..node.node import Node
 from ..route import Route, StaticRoute
+from ..registry import Registry
+from ..reloader import Reloader
+from ..metrics import Metrics, PROMETHEUS_CONTENT_TYPE
+from ..tracer import Tracer
+from ..dispatcher import Dispatcher
+from ..profiler import Profiler
 from ..theme import REDTheme
 from ..auth import AuthCollection
+from ..bridge import Bridge, SocketBridge, FileBridge
+from ..bridge.codec import get_codec
 from .editor.widget import Widget
+from .handle import REDHandle
 from ... import __path__
 
 
+# delay(second) before restart of Node-RED, doubles until max, reset after Node-RED ran RESTART_RESET seconds
+RESTART_DELAY, MAX_RESTART_DELAY, RESTART_RESET = 1, 60, 60
+# printed by index.js when Node-RED started
+READY_MARKER = "nodered.py:ready"
+# number of stderr lines of Node-RED in startup errors
+STDERR_TAIL = 20
+
 class RED:
     """
     Node-RED manager class
     """
-    registered_nodes:List[Node] = []
-    registered_routes:List[Route] = []
+    registry:Registry = Registry()
 
-    def __init__(self, user_dir:str, node_red_dir:str, admin_root:str, node_root:str, port:int, default_flow:str, remote_access:bool, default_categories:List[str], node_globals:dict):
+    def __init__(self, user_dir:str, node_red_dir:str, admin_root:str, node_root:str, port:int, default_flow:str, remote_access:bool, default_categories:List[str], node_globals:dict, bridge_mode:Literal["socket", "file"] = "socket", concurrency:int = None, queue_size:int = 256, codec:Literal["json", "orjson", "msgpack"] = "json", npm_install:Literal["auto", "always", "never"] = "auto", metrics_url:str = None, trace_rate:float = 0.0, profile_url:str = None):
         """
         Set configs of Node-RED and setup
 
@@ -46,10 +68,66 @@ class RED:
         default_categories: List[str]
             list of categories to show default
             (for detail information, see `Editor Configuration/paletteCategories` section of https://nodered.org/docs/user-guide/runtime/configuration)
+        node_globals: dict
+            global variables for Node-RED
+        bridge_mode: str, default socket
+            channel for messages between Node-RED and python
+            options: socket, file
+        concurrency: int, default None
+            number of shared workers to run Node functions
+            if None, min(32, cpu count + 4)
+        queue_size: int, default 256
+            number of messages can wait for workers
+            when full, Node-RED side waits and retries(node status shows "Busy")
+        codec: str, default json
+            serializer of messages between Node-RED and python
+            options: json, orjson(`pip install orjson`), msgpack(`pip install msgpack`)
+        npm_install: str, default auto
+            run `npm install` in node_red_dir or not
+            options: auto(only when package.json or lockfile changed from last install), always, never
+        metrics_url: str, default None
+            if set, serve `metrics` in Prometheus text format at this url(GET route on root of http server, not under node_root)
+        trace_rate: float, default 0.0
+            ratio of messages to trace spans of each hop(see `tracer`), 0.0 ~ 1.0
+        profile_url: str, default None
+            if set, profile Node or route on demand by POST to this url(see `profiler`), returns pstats or collapsed stacks
+            body: { "node": name or "route": "{method} {url}", "calls": int, "seconds": float, "mode": "cprofile" or "sampling" }
+            (POST route under admin_root, needs write permission of `node_auths` if set)
         """
         self.user_dir, self.admin_root, self.node_root, self.port, self.default_flow, self.remote_access, self.node_globals, self.__editor_theme, self.__node_auths =\
             user_dir, admin_root, node_root, port, default_flow, remote_access, node_globals, REDTheme(), AuthCollection()
         self.__default_categories = default_categories
+        self.__bridge:Bridge = None
+        self.__loop:asyncio.AbstractEventLoop = None
+        self.__dispatcher:Dispatcher = None
+        self.__metrics = Metrics()
+        self.__tracer = Tracer(trace_rate)
+        self.__profiler = Profiler(RED.registry)
+
+        if not bridge_mode in ( "socket", "file" ):
+            raise ValueError("`bridge_mode` must be one of 'socket', 'file'!")
+
+        self.bridge_mode = bridge_mode
+        self.concurrency = min(32, (os.cpu_count() or 1) + 4) if concurrency is None else concurrency
+        self.queue_size = queue_size
+        # raises when codec is unknown or not installed
+        self.codec = get_codec(codec).name
+
+        if not npm_install in ( "auto", "always", "never" ):
+            raise ValueError("`npm_install` must be one of 'auto', 'always', 'never'!")
+
+        # routes of this RED, registered at launch(see `__add_routes`)
+        self.__routes:List[Route] = []
+        if metrics_url is not None:
+            self.__routes.append(
+                Route(metrics_url, "get", lambda route_data: self.__metrics.to_prometheus(), PROMETHEUS_CONTENT_TYPE)
+            )
+
+        if profile_url is not None:
+            self.__routes.append(
+                Route(profile_url, "post", self.__profile_route, "text/plain; charset=utf-8", admin = True)
+            )
+
         self.__temp_dir, self.__node_dir =\
             os.path.join(__path__[0], ".temp"), os.path.join(__path__[0], ".nodejs")
 
@@ -134,22 +212,56 @@ class RED:
             if os.path.exists(node_red_dir):
                 if not { "index.js", "package.json" }.issubset(set(os.listdir(node_red_dir))):
                     raise RuntimeError("Target `node_red_dir` is not Node-RED dir format!")
-
-                shutil.copyfile(os.path.join(__path__[0], "node-red-starter", "index.js"), os.path.join(node_red_dir, "index.js"))
             else:
                 os.mkdir(node_red_dir)
-                shutil.copyfile(os.path.join(__path__[0], "node-red-starter", "index.js"), os.path.join(node_red_dir, "index.js"))
                 shutil.copyfile(os.path.join(__path__[0], "node-red-starter", "package.json"), os.path.join(node_red_dir, "package.json"))
 
-        self.__started_file = os.path.join(self.node_red_dir, "started")
+            for script in ( "index.js", "route.js", "bridge.js" ):
+                shutil.copyfile(os.path.join(__path__[0], "node-red-starter", script), os.path.join(node_red_dir, script))
+
+        # pid of Node-RED, to stop it after python crashed
+        self.__pid_file = os.path.join(self.node_red_dir, "nodered.pid")
+        self.__process:subprocess.Popen = None
+        self.__stats = { "restarts": 0, "downtime": 0.0, "last_exit_code": None }
 
         # setup Node-RED starter
-        subprocess.call(
+        self.__install_starter(npm_install)
+
+    # fingerprint of dependencies, package.json and lockfile
+    def __starter_fingerprint(self) -> str:
+        sha = hashlib.sha256()
+        for name in ( "package.json", "package-lock.json" ):
+            file = os.path.join(self.node_red_dir, name)
+            if os.path.exists(file):
+                with open(file, "rb") as fr:
+                    sha.update(name.encode("utf-8") + b"\0" + fr.read())
+
+        return sha.hexdigest()
+
+    def __install_starter(self, npm_install:str):
+        modules_dir = os.path.join(self.node_red_dir, "node_modules")
+        stamp_file = os.path.join(modules_dir, ".nodered-py-install")
+
+        if npm_install == "never":
+            if not os.path.exists(modules_dir):
+                raise RuntimeError(f"`node_modules` not found in {self.node_red_dir}, run `npm install` there or set `npm_install`!")
+
+            return
+
+        if npm_install == "auto" and os.path.exists(stamp_file):
+            with open(stamp_file, "r", encoding = "utf-8") as sfr:
+                if sfr.read() == self.__starter_fingerprint():
+                    return
+
+        if subprocess.call(
             [ self.__npm_path, "install" ],
             stdout = subprocess.DEVNULL,
             stderr = subprocess.STDOUT,
             cwd = self.node_red_dir
-        )
+        ) == 0:
+            # npm may update lockfile, fingerprint after install
+            with open(stamp_file, "w", encoding = "utf-8") as sfw:
+                sfw.write(self.__starter_fingerprint())
 
     @property
     def editor_theme(self) -> REDTheme:
@@ -158,6 +270,49 @@ class RED:
         """
         return self.__editor_theme
     
+    @property
+    def metrics(self) -> Metrics:
+        """
+        call counts, errors, in-flight gauges and latency histograms(bridge, queue, exec) of Nodes and routes
+        """
+        return self.__metrics
+
+    @property
+    def tracer(self) -> Tracer:
+        """
+        spans of sampled messages through Node-RED and python, exported as OpenTelemetry json or Chrome trace
+        """
+        return self.__tracer
+
+    @property
+    def profiler(self) -> Profiler:
+        """
+        profiler of Node functions and routes on demand(cProfile or sampling)
+        """
+        return self.__profiler
+
+    # body: { node | route, calls, seconds, mode, sort, limit }, values of form are strings
+    async def __profile_route(self, data:dict) -> str:
+        kind = "node" if "node" in data else "route"
+        args = (
+            kind, data.get(kind, ""),
+            None if data.get("calls") is None else int(data["calls"]),
+            None if data.get("seconds") is None else float(data["seconds"]),
+            data.get("mode", "cprofile"), data.get("sort", "cumulative"), int(data.get("limit", 50))
+        )
+
+        # waits up to minutes, on own thread not to hold workers of routes
+        profiled = Future()
+
+        def run():
+            try:
+                profiled.set_result(self.__profiler.profile(*args))
+            except BaseException as e:
+                profiled.set_exception(e)
+
+        Thread(target = run, daemon = True).start()
+        return await asyncio.wrap_future(profiled)
+
     @property
     def node_auths(self) -> AuthCollection:
         """
@@ -165,9 +320,9 @@ class RED:
         """
         return self.__node_auths
     
-    def __save_config(self, is_ready:bool):
+    def __save_config(self):
         categories = []
-        for node in RED.registered_nodes:
+        for node in RED.registry.nodes:
             if not node.category in categories:
                 categories.append(node.category)
 
@@ -185,23 +340,23 @@ class RED:
                 "enableRemoteAccess": self.remote_access,
                 "categories": categories,
                 "editorTheme": self.editor_theme.to_dict(),
-                "adminAuth": [] if is_ready else self.node_auths.to_list(),
+                "adminAuth": self.node_auths.to_list(),
                 "globals": self.node_globals,
-                "cacheDir": os.path.join(self.user_dir, ".cache"),
+                "bridge": dict(self.__bridge.to_dict(), traceRate = self.__tracer.rate),
                 "routes": [
                     route.to_dict()
-                    for route in RED.registered_routes
+                    for route in RED.registry.routes
                 ]
             }, cfw, indent = 4)
     
-    def register(self, node_func:MethodType, name:str, category:str = "nodered_py", version:str = "1.0.0", description:str = "", author:str = "nodered.py", keywords:List[str] = [], icon:str = "function.png", color:str = "#FDD0A2", widgets:List[Widget] = []):
+    def register(self, node_func:MethodType, name:str, category:str = "nodered_py", version:str = "1.0.0", description:str = "", author:str = "nodered.py", keywords:List[str] = [], icon:str = "function.png", color:str = "#FDD0A2", widgets:List[Widget] = [], concurrency:int = None, executor:Literal["thread", "process"] = "thread", batch_size:int = None, max_batch_wait_ms:float = 5):
         """
         Function to register Node function
 
         Parameters
         ----------
         name: str, required
-            name of Node to register
+            name of Node to register(must be unique)
         category: str, default nodered_py
             category of Node
         version: str, default 1.0.0
@@ -216,17 +371,31 @@ class RED:
             icon of Node(html)
         widgets: List[Widget]
             list of widgets to display in editor dialog
+        concurrency: int, default None
+            number of workers only for this Node
+            if None, use shared workers of RED(or cpu count for "process" executor, 1024 for `async def`)
+        executor: str, default thread
+            where Node function runs(`async def` function always runs on event loop of RED)
+            options: thread, process
+            "process" runs in worker processes started with RED, for cpu-bound functions
+            (function must be defined at module level, and main script must start RED under `if __name__ == "__main__":`)
+        batch_size: int, default None
+            if set, Node function is called with ( node, list of ( props, msg ) ) up to `batch_size` messages
+            and must return list of msg in same order
+        max_batch_wait_ms: float, default 5
+            max time(ms) to wait more messages after first message of batch
         """
-        RED.registered_nodes.append(
+        RED.registry.add_node(
             Node(
                 name, category,
                 version, description, author, keywords,
                 icon, color,
-                widgets, node_func
+                widgets, node_func, concurrency, executor,
+                batch_size, max_batch_wait_ms
             )
         )
 
-    def route(route_func:MethodType, url:str, method:Literal["get", "post"]):
+    def route(self, route_func:MethodType, url:str, method:Literal["get", "post"]):
         """
         Function to register route to Node-RED
 
@@ -240,7 +409,7 @@ class RED:
             method of route point
             options: get, post
         """
-        RED.registered_routes.append(
+        RED.registry.add_route(
             Route(url, method, route_func)
         )
 
@@ -255,76 +424,75 @@ class RED:
         path: PathLike, required
             file path for static point
         """
-        RED.registered_routes.append(
+        RED.registry.add_route(
             StaticRoute(url, path)
         )
 
-    # check input(node)
-    def __check_node_input(self, node_input_file:os.PathLike, node_output_file:os.PathLike):
-        # if node input exists
-        if os.path.exists(node_input_file):
-            # read input file
-            while True:
-                # if cannot read file or read during file writing, read file until can read
+    # routes of registry are class-level, so registered while this RED running(other RED in same process may register same)
+    def __add_routes(self):
+        for route in self.__routes:
+            if RED.registry.get_route(route.method, route.url) is None:
+                RED.registry.add_route(route)
+
+    def __remove_routes(self):
+        for route in self.__routes:
+            if RED.registry.get_route(route.method, route.url) is route:
+                RED.registry.remove_route(route.method, route.url)
+
+    # set executor of node and generate package, returns package changed or not
+    def __prepare_node(self, node:Node, previous:Node = None) -> bool:
+        self.__dispatcher.prepare_node(node, previous)
+        return node.create(self.user_dir, os.path.join(self.node_red_dir, "bridge.js"))
+
+    # called by Reloader, apply reloaded module to running Node-RED
+    def __on_reload(self, module_name:str, reloaded:List[tuple], removed:list):
+        modules, removed_modules, routes = [], [], []
+        for previous, registered in reloaded:
+            if isinstance(registered, Node):
                 try:
-                    with open(node_input_file, "r", encoding = "utf-8") as ifr:
-                        input_data = json.load(ifr)
-                    
-                    os.remove(node_input_file)
-                    break
-                except ( json.JSONDecodeError, FileNotFoundError ):
-                    pass
-
-            node = list(filter(lambda n: n.name == input_data["name"], RED.registered_nodes))[0]
-
-            node.run(input_data["props"], input_data["msg"], node_output_file)
-            # self.__write_node_output(
-            #     node_output_file,
-            #     node.run(input_data["props"], input_data["msg"])
-            # )
-
-    # write output(node)
-    def __write_node_output(self, output_file:str, res:dict):
-        try:
-            with open(output_file, "w", encoding = "utf-8") as ofw:
-                json.dump(res, ofw, indent = 4)
-        except:
-            os.remove(output_file)
-            res["req"]["body"] = {}
-            self.__write_node_output(output_file, res)
-
-    # check input(route)
-    def __check_route_input(self, route_input_file:os.PathLike, route_output_file:os.PathLike):
-        # if route input exists
-        if os.path.exists(route_input_file):
-            # read input file
-            while True:
-                # if cannot read file or read during file writing, read file until can read
-                try:
-                    with open(route_input_file, "r", encoding = "utf-8") as ifr:
-                        input_data = json.load(ifr)
-                    
-                    os.remove(route_input_file)
-                    break
-                except json.JSONDecodeError:
-                    pass
-
-            route:Route = list(filter(lambda r: r.url == input_data["url"], RED.registered_routes))[0]
-            self.__write_route_output(
-                route_output_file,
-                route.run(input_data["data"])
-            )
-
-    # write output(route)
-    def __write_route_output(self, output_file:str, res:Union[str, dict]):
-        with open(output_file, "w", encoding = "utf-8") as ofw:
-            if isinstance(res, str):
-                ofw.write(res)
+                    changed = self.__prepare_node(registered, previous)
+                except:
+                    traceback.print_exc()
+                    RED.registry.remove_node(registered.name)
+                    if previous is not None:
+                        RED.registry.add_node(previous)
+
+                    continue
+
+                if previous is not None and previous.executor_type == "process":
+                    previous.executor.shutdown()
+
+                if changed:
+                    modules.append(registered.package_name)
+            elif previous is None:
+                # new route, mapped by Node-RED side
+                routes.append(registered.to_dict())
+
+        for item in removed:
+            if isinstance(item, Node):
+                RED.registry.remove_node(item.name)
+                shutil.rmtree(os.path.join(self.user_dir, "node_modules", item.package_name), ignore_errors = True)
+                removed_modules.append(item.package_name)
             else:
-                json.dump(res, ofw, indent = 4)
+                # express cannot unmap route, answered as not registered
+                RED.registry.remove_route(item.method, item.url)
 
+        print(f"\n{module_name} reloaded\n")
+        if len(modules) + len(removed_modules) + len(routes) > 0:
+            self.__bridge.notify({ "type": "reload", "modules": modules, "removed": removed_modules, "routes": routes })
 
-    def start(self, callback:MethodType = None, debug:bool = True, start_browser:bool = True):
+    @property
+    def process_stats(self) -> dict:
+        """
+        stats of Node-RED process, for alerts
+            - restarts: number of restarts by supervisor
+            - downtime: total seconds Node-RED was down before restarted
+            - last_exit_code: exit code of last exited Node-RED, None if not exited
+            - running: Node-RED is running or not
+        """
+        return dict(self.__stats, running = self.__process is not None and self.__process.poll() is None)
+
+    def start(self, callback:MethodType = None, debug:bool = True, start_browser:bool = True, reload:bool = False, supervise:bool = False, startup_timeout:float = 60, block:bool = True) -> Optional[REDHandle]:
         """
         Start Node-RED server
 
@@ -336,11 +504,122 @@ class RED:
             show outputs on console or not
         start_browser: bool, default True
             open editor in system browser or not
+        reload: bool, default False
+            watch modules of registered Node functions and routes, and reload changed ones without restarting Node-RED
+            (functions defined in main script are not reloaded)
+        supervise: bool, default False
+            restart Node-RED when exited(not by `stop`), waiting 1 second doubled up to 60 seconds between restarts
+            if False, serving ends when Node-RED exited
+            (see `process_stats` for restarts, downtime)
+        startup_timeout: float, default 60
+            seconds to wait Node-RED started, raises `TimeoutError` with last stderr lines of Node-RED after this
+        block: bool, default True
+            serve on this thread until stopped
+            if False, serve on background thread and return handle after Node-RED started
+
+        Return
+        ------
+        handle: REDHandle
+            handle to wait or stop background serving, None if `block`
         """
+        if block:
+            loop = asyncio.new_event_loop()
+            serving = loop.create_task(self.serve(callback, debug, start_browser, reload, supervise, startup_timeout))
+            try:
+                loop.run_until_complete(serving)
+            except KeyboardInterrupt:
+                # loop stopped by interrupt, finish messages on it
+                if self.__bridge is not None:
+                    loop.run_until_complete(self.__dispatcher.drain(10))
 
-        # setup user_dir
-        self.__start_for_ready()
-        # kill if process listen on port
+                self.stop()
+                # end serving(and watcher, reloader) before closing loop
+                serving.cancel()
+                loop.run_until_complete(asyncio.gather(serving, return_exceptions = True))
+            finally:
+                loop.close()
+
+            return None
+
+        started = Future()
+
+        def on_started():
+            started.set_result(None)
+            if callback:
+                callback()
+
+        def run():
+            loop = asyncio.new_event_loop()
+            try:
+                loop.run_until_complete(self.serve(on_started, debug, start_browser, reload, supervise, startup_timeout))
+            except BaseException as e:
+                if not started.done():
+                    started.set_exception(e)
+                else:
+                    traceback.print_exc()
+            finally:
+                loop.close()
+
+        thread = Thread(target = run, daemon = True)
+        thread.start()
+        # raises errors while starting
+        started.result()
+
+        return REDHandle(self, thread)
+
+    async def serve(self, callback:MethodType = None, debug:bool = True, start_browser:bool = True, reload:bool = False, supervise:bool = False, startup_timeout:float = 60):
+        """
+        Start Node-RED server and serve on running event loop until stopped
+        (bridge, `async def` Node functions and routes run on this loop)
+
+        Parameters
+        ----------
+        callback: MethodType, default None
+            callback when Node-RED server started
+        debug: bool, default True
+            show outputs on console or not
+        start_browser: bool, default True
+            open editor in system browser or not
+        reload: bool, default False
+            watch modules of registered Node functions and routes, and reload changed ones without restarting Node-RED
+            (functions defined in main script are not reloaded)
+        supervise: bool, default False
+            restart Node-RED when exited(not by `stop`), waiting 1 second doubled up to 60 seconds between restarts
+            if False, serving ends when Node-RED exited
+            (see `process_stats` for restarts, downtime)
+        startup_timeout: float, default 60
+            seconds to wait Node-RED started, raises `TimeoutError` with last stderr lines of Node-RED after this
+        """
+        await self.__launch(debug, startup_timeout)
+
+        if start_browser:
+            import webbrowser
+            webbrowser.open_new(f"http://127.0.0.1:{self.port}{self.admin_root}")
+
+        if callback:
+            callback()
+
+        await self.__run(reload, supervise)
+
+    async def __aenter__(self) -> "RED":
+        """
+        Start Node-RED server and serve in background of running event loop
+        (same as `serve` with default arguments, but browser not opened)
+        """
+        await self.__launch(True, 60)
+        self.__serving = self.__loop.create_task(self.__run(False, False))
+
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.__loop.run_in_executor(None, self.stop)
+        await self.__serving
+
+    # setup nodes, bridge and start Node-RED
+    async def __launch(self, debug:bool, startup_timeout:float):
+        # setup user_dir, Node-RED creates others(settings, flows, ...) on start
+        os.makedirs(os.path.join(self.user_dir, "node_modules"), exist_ok = True)
+        # stop Node-RED started before
         self.stop()
 
         # set cache_dir
@@ -350,13 +629,25 @@ class RED:
 
         os.mkdir(self.__cache_dir)
 
-        # remove existing nodes
-        for node_dir in glob(os.path.join(self.user_dir, "node_modules", "nodered-py-*")):
-            shutil.rmtree(node_dir)
+        # event loop for bridge and `async def` functions
+        self.__loop = asyncio.get_running_loop()
+        self.__dispatcher = Dispatcher(RED.registry, self.__loop, self.concurrency, self.queue_size, self.__metrics, self.__tracer)
+
+        # open bridge
+        self.__bridge = (SocketBridge if self.bridge_mode == "socket" else FileBridge)(self.__cache_dir, self.__dispatcher.handle, self.codec)
+        self.__bridge.open()
 
-        # create custom nodes
-        for node in RED.registered_nodes:
-            node.create(self.user_dir, self.__cache_dir)
+        self.__add_routes()
+
+        # create custom nodes, unchanged packages are kept
+        for node in RED.registry.nodes:
+            self.__prepare_node(node)
+
+        # remove packages of nodes not registered
+        package_names = [ node.package_name for node in RED.registry.nodes ]
+        for node_dir in glob(os.path.join(self.user_dir, "node_modules", "nodered-py-*")):
+            if not os.path.basename(node_dir) in package_names:
+                shutil.rmtree(node_dir)
 
         if self.editor_theme.page.favicon is not None:
             favicon_file = os.path.join(self.node_red_dir, "favicon.ico")
@@ -376,84 +667,196 @@ class RED:
 
             # self.editor_theme.page.favicon = favicon_file
 
-        # save configs
-        self.__save_config(False)
-
         # run Node-RED server
-        subprocess.Popen([
-            self.__node_path,
-            "index.js"
-        ], shell = False, stdout = sys.stdout if debug else subprocess.DEVNULL, stderr = subprocess.STDOUT, cwd = self.node_red_dir)
-
-        while True:
-            if os.path.exists(self.__started_file):
-                if start_browser:
-                    import webbrowser
-                    webbrowser.open_new(f"http://127.0.0.1:{self.port}{self.admin_root}")
-
-                if callback:
-                    callback()
+        self.__debug, self.__startup_timeout, self.__stats = debug, startup_timeout, { "restarts": 0, "downtime": 0.0, "last_exit_code": None }
+        try:
+            await self.__loop.run_in_executor(None, self.__boot)
+        except:
+            self.stop()
+            raise
 
-                break
+    # serve bridge until stopped
+    async def __run(self, reload:bool, supervise:bool):
+        tasks = [ self.__loop.create_task(self.__watch_process(supervise)) ]
+        if reload:
+            tasks.append(self.__loop.create_task(Reloader(RED.registry, self.__on_reload).watch()))
 
         try:
-            while True:
-                self.__check_node_input(
-                    os.path.join(self.__cache_dir, "node_input.json"),
-                    os.path.join(self.__cache_dir, "node_output.json")
-                )
-                self.__check_route_input(
-                    os.path.join(self.__cache_dir, "route_input.json"),
-                    os.path.join(self.__cache_dir, "route_output.json")
-                )
-        except KeyboardInterrupt:
-            self.stop()
+            await self.__bridge.serve()
+        finally:
+            for task in tasks:
+                task.cancel()
 
-    def __start_for_ready(self):
-        """
-        Start Node-RED for setup default userDir
-        """
-        # stop for safety
-        self.stop()
+            await asyncio.gather(*tasks, return_exceptions = True)
 
-        if os.path.exists(self.__started_file):
-            os.remove(self.__started_file)
+    # start Node-RED process and wait until Node-RED prints ready marker
+    def __boot(self):
+        # index.js removes config after read
+        self.__save_config()
 
-        # save configs
-        self.__save_config(True)
+        # own process group, Ctrl+C of terminal is not sent to Node-RED(stopped by `stop` after draining)
+        if sys.platform == "win32":
+            group = { "creationflags": subprocess.CREATE_NEW_PROCESS_GROUP }
+        else:
+            group = { "start_new_session": True }
 
-        subprocess.Popen([
+        self.__process = process = subprocess.Popen([
             self.__node_path,
             "index.js"
-        ], shell = False, stdout = subprocess.DEVNULL, stderr = subprocess.STDOUT, cwd = self.node_red_dir)
-
+        ], shell = False, stdout = subprocess.PIPE, stderr = subprocess.PIPE, cwd = self.node_red_dir, encoding = "utf-8", errors = "replace", **group)
+        with open(self.__pid_file, "w", encoding = "utf-8") as pfw:
+            pfw.write(str(process.pid))
+
+        # set by marker, or end of output(exited)
+        started, ready, errors = Event(), [], deque(maxlen = STDERR_TAIL)
+
+        def pump_stdout():
+            for line in process.stdout:
+                if line.rstrip() == READY_MARKER:
+                    ready.append(True)
+                    started.set()
+                elif self.__debug:
+                    sys.stdout.write(line)
+
+            started.set()
+
+        def pump_stderr():
+            for line in process.stderr:
+                errors.append(line)
+                if self.__debug:
+                    sys.stderr.write(line)
+
+        stderr_pump = Thread(target = pump_stderr, daemon = True)
+        Thread(target = pump_stdout, daemon = True).start()
+        stderr_pump.start()
+
+        if not started.wait(self.__startup_timeout):
+            _terminate(process, 1)
+            raise TimeoutError(f"Node-RED not started in {self.__startup_timeout} seconds\n{''.join(errors)}")
+
+        if len(ready) == 0:
+            # wait rest of stderr
+            process.wait()
+            stderr_pump.join(1)
+            raise RuntimeError(f"Node-RED exited with code {process.returncode} while starting\n{''.join(errors)}")
+
+        # stopped while starting(restart by supervisor)
+        if self.__bridge is None:
+            self.__process = None
+            _terminate(process, 1)
+
+    # wait Node-RED exits, restart with backoff if supervised or stop bridge
+    async def __watch_process(self, supervise:bool):
+        delay = RESTART_DELAY
         while True:
-            if os.path.exists(self.__started_file):
+            process, up_since = self.__process, time.monotonic()
+            if process is None:
+                return
+
+            # on thread, no polling
+            await self.__loop.run_in_executor(None, process.wait)
+
+            # stopped by `stop`
+            if not self.__process is process:
+                return
+
+            self.__stats["last_exit_code"] = process.returncode
+            if not supervise:
+                print(f"Node-RED exited with code {process.returncode}")
                 self.stop()
-                break
+                return
+
+            # reset backoff when Node-RED ran for a while
+            if time.monotonic() - up_since > RESTART_RESET:
+                delay = RESTART_DELAY
+
+            down_since = time.monotonic()
+            while self.__process is process:
+                print(f"Node-RED exited with code {process.returncode}, restart after {delay} seconds")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_RESTART_DELAY)
+                if not self.__process is process:
+                    return
+
+                self.__stats["restarts"] += 1
+                try:
+                    await self.__loop.run_in_executor(None, self.__boot)
+                except Exception:
+                    traceback.print_exc()
+                    process = self.__process
 
-        import time
-        time.sleep(1)
+            self.__stats["downtime"] += time.monotonic() - down_since
 
-    def stop(self):
+    def stop(self, timeout:float = 5, drain_timeout:float = 10):
         """
         Stop Node-RED server
+
+        new messages are refused and messages in flight are finished(outputs sent to Node-RED) first
+
+        Parameters
+        ----------
+        timeout: float, default 5
+            seconds to wait Node-RED closes flows, killed after this
+        drain_timeout: float, default 10
+            seconds to wait messages in flight, stopped without waiting others after this
         """
-        import psutil, signal
+        loop = self.__loop
+        if self.__bridge is not None and loop is not None and loop.is_running() and not _is_loop_thread(loop):
+            asyncio.run_coroutine_threadsafe(self.__dispatcher.drain(drain_timeout), loop).result()
 
-        if os.path.exists(self.__started_file):
-            os.remove(self.__started_file)
+        if self.__bridge is not None:
+            self.__bridge.close()
+            self.__bridge = None
 
-        killed = False
-        for process in psutil.process_iter():
-            try:
-                for conns in process.connections(kind = "inet"):
-                    if conns.laddr.port == self.port:
-                        process.send_signal(signal.SIGTERM)
-                        killed = True
-                        break
-            except ( psutil.AccessDenied, psutil.ZombieProcess ):
-                pass
-
-            if killed:
-                break
+        # stop workers of this launch, next launch creates new ones
+        if self.__dispatcher is not None:
+            self.__dispatcher.shutdown()
+
+        self.__remove_routes()
+
+        if self.__process is not None:
+            # set None first, so watcher does not restart
+            process, self.__process = self.__process, None
+            _terminate(process, timeout)
+        else:
+            # Node-RED left by crashed python
+            self.__stop_stale(timeout)
+
+        if os.path.exists(self.__pid_file):
+            os.remove(self.__pid_file)
+
+    def __stop_stale(self, timeout:float):
+        import psutil
+
+        if not os.path.exists(self.__pid_file):
+            return
+
+        try:
+            with open(self.__pid_file, "r", encoding = "utf-8") as pfr:
+                process = psutil.Process(int(pfr.read().strip()))
+
+            # pid may be reused by other process
+            if process.cwd() == os.path.realpath(self.node_red_dir) and "index.js" in process.cmdline():
+                _terminate(process, timeout)
+        except ( ValueError, psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess ):
+            pass
+
+
+def _is_loop_thread(loop:asyncio.AbstractEventLoop) -> bool:
+    try:
+        return asyncio.get_running_loop() is loop
+    except RuntimeError:
+        return False
+
+# SIGTERM(Node-RED closes flows), and kill if not exited until timeout
+def _terminate(process:Union[subprocess.Popen, "psutil.Process"], timeout:float):
+    import psutil
+
+    try:
+        process.terminate()
+        process.wait(timeout)
+    except ( subprocess.TimeoutExpired, psutil.TimeoutExpired ):
+        process.kill()
+        process.wait()
+    except psutil.NoSuchProcess:
+        pass
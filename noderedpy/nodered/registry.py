@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+from typing import List, Dict, Tuple, Optional, Iterator, Union
+from contextlib import contextmanager
+from .node.node import Node
+from .route import Route
+
+
+class Registry:
+    """
+    Registered Nodes and routes, indexed for dispatch of bridge requests
+    """
+    def __init__(self):
+        self.__nodes:Dict[str, Node] = {}
+        self.__routes:Dict[Tuple[str, str], Route] = {}
+        # ( previous, registered ) while reloading, see `reloading`
+        self.__reloaded:List[tuple] = None
+        self.__reloaded_keys:set = set()
+
+    @property
+    def nodes(self) -> List[Node]:
+        """
+        registered Nodes, in order of registration
+        """
+        return list(self.__nodes.values())
+
+    @property
+    def routes(self) -> List[Route]:
+        """
+        registered routes(including static), in order of registration
+        """
+        return list(self.__routes.values())
+
+    def add_node(self, node:Node):
+        """
+        Register Node, name must be unique
+        """
+        self.__add(self.__nodes, node.name, node, f"Node `{node.name}`")
+
+    def add_route(self, route:Route):
+        """
+        Register route, ( method, url ) must be unique
+        """
+        self.__add(self.__routes, ( route.method, route.url ), route, f"route `{route.method} {route.url}`")
+
+    def __add(self, index:dict, key:Union[str, tuple], item:Union[Node, Route], label:str):
+        # registered again by reloaded module replaces previous one
+        if key in index and ( self.__reloaded is None or key in self.__reloaded_keys ):
+            raise ValueError(f"{label} is already registered!")
+
+        if self.__reloaded is not None:
+            self.__reloaded.append(( index.get(key), item ))
+            self.__reloaded_keys.add(key)
+
+        index[key] = item
+
+    def remove_node(self, name:str) -> Optional[Node]:
+        """
+        Unregister Node, returns removed Node
+        """
+        return self.__nodes.pop(name, None)
+
+    def remove_route(self, method:str, url:str) -> Optional[Route]:
+        """
+        Unregister route, returns removed route
+        """
+        return self.__routes.pop(( method, url ), None)
+
+    @contextmanager
+    def reloading(self) -> Iterator[List[tuple]]:
+        """
+        While reloading modules, Nodes and routes registered again replace previous ones instead of raising
+
+        Yield
+        -----
+        reloaded: List[tuple]
+            list of ( previous, registered ) filled while reloading, previous is None for new one
+        """
+        reloaded = self.__reloaded = []
+        self.__reloaded_keys = set()
+        try:
+            yield reloaded
+        finally:
+            self.__reloaded = None
+
+    def get_node(self, name:str) -> Optional[Node]:
+        """
+        Find Node by name, None if not registered
+        """
+        return self.__nodes.get(name)
+
+    def get_route(self, method:str, url:str) -> Optional[Route]:
+        """
+        Find route by method and url(pattern of route, not requested path), None if not registered
+        """
+        return self.__routes.get(( method, url ))
+
+    def clear(self):
+        """
+        Remove all Nodes and routes
+        """
+        self.__nodes.clear()
+        self.__routes.clear()
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+import os, sys, importlib, traceback, asyncio
+from types import MethodType
+from typing import List, Dict
+from .registry import Registry
+
+
+# interval(second) to check modules
+RELOAD_INTERVAL = 1.0
+
+class Reloader:
+    """
+    Watches modules of registered Node functions and routes, and reloads changed modules
+
+    while reloading, Nodes and routes registered by module replace previous ones(see `Registry.reloading`)
+    functions defined in `__main__` are not watched, main script cannot be imported again
+    functions of nodered.py itself(metrics route) are not watched too
+    """
+    def __init__(self, registry:Registry, on_reload:MethodType, interval:float = RELOAD_INTERVAL):
+        """
+        Parameters
+        ----------
+        registry: Registry, required
+            registry of RED
+        on_reload: MethodType, required
+            function called with ( module name, reloaded:List[tuple], removed:list ) after each module reloaded
+            reloaded is list of ( previous, registered ), removed is Nodes and routes not registered again
+        interval: float, default 1.0
+            interval(second) to check modules
+        """
+        self.registry, self.interval = registry, interval
+        self.__on_reload = on_reload
+        self.__mtimes:Dict[str, int] = {}
+
+    def __modules(self) -> Dict[str, str]:
+        modules = {}
+        for func in [ node.node_func for node in self.registry.nodes ] + [ route.target for route in self.registry.routes ]:
+            module = sys.modules.get(getattr(func, "__module__", None) or "__main__")
+            # nodered.py itself(metrics route, ...) is not watched
+            if module is not None and not module.__name__ == "__main__" and not module.__name__.startswith("noderedpy.") and getattr(module, "__file__", None):
+                modules[module.__name__] = module.__file__
+
+        return modules
+
+    def __owned(self, module_name:str) -> list:
+        return [
+            node for node in self.registry.nodes
+            if node.node_func.__module__ == module_name
+        ] + [
+            route for route in self.registry.routes
+            if getattr(route.target, "__module__", None) == module_name
+        ]
+
+    def check(self) -> List[str]:
+        """
+        Reload modules changed from last check(first check only records)
+
+        Return
+        ------
+        reloaded: List[str]
+            names of reloaded modules
+        """
+        reloaded = []
+        for module_name, file in self.__modules().items():
+            try:
+                mtime = os.stat(file).st_mtime_ns
+            except OSError:
+                continue
+
+            previous_mtime = self.__mtimes.get(module_name)
+            self.__mtimes[module_name] = mtime
+            if previous_mtime is None or previous_mtime == mtime:
+                continue
+
+            owned = self.__owned(module_name)
+            with self.registry.reloading() as registered:
+                try:
+                    importlib.reload(sys.modules[module_name])
+                    replaced = [ previous for previous, _ in registered ]
+                    removed = [ item for item in owned if not item in replaced ]
+                except:
+                    # keep functions not registered again of broken module
+                    traceback.print_exc()
+                    removed = []
+
+            self.__on_reload(module_name, registered, removed)
+            reloaded.append(module_name)
+
+        return reloaded
+
+    async def watch(self):
+        """
+        Check modules every `interval` until cancelled
+        """
+        self.check()
+        while True:
+            await asyncio.sleep(self.interval)
+            self.check()
@@ -1,35 +1,64 @@
 # -*- coding: utf-8 -*-
-import os, gc, traceback
+import os, traceback, asyncio
 from types import MethodType
 
 
 class Route:
-    def __init__(self, url:str, method:str, target:MethodType):
+    def __init__(self, url:str, method:str, target:MethodType, content_type:str = None, admin:bool = False):
         # check url is valid
         if not url.startswith("/"):
             raise ValueError("url must starts with `/`!")
 
-        self.url, self.method = url, method
+        self.url, self.method, self.content_type = url, method, content_type
+        # served under admin_root with adminAuth of Node-RED, instead of node_root
+        self.admin = admin
         self.__target = target
+        self.is_async = asyncio.iscoroutinefunction(target)
+        # ProfileSession while profiling, see `Profiler`
+        self.profile = None
+
+    @property
+    def target(self) -> MethodType:
+        """
+        function registered as route
+        """
+        return self.__target
 
     def run(self, route_data:dict) -> dict:
-        gc.enable()
+        print(f"\n{self.method} | {self.url} entered\n=============================================")
+        try:
+            data = (self.__target if self.profile is None else self.profile.wrap(self.__target))(route_data)
 
+            print("======================================= ended\n")
+
+            return self.__success(data)
+        except:
+            return { "state": "fail", "message": traceback.format_exc() }
+
+    async def run_async(self, route_data:dict) -> dict:
         print(f"\n{self.method} | {self.url} entered\n=============================================")
         try:
-            data = self.__target(route_data)
+            data = await (self.__target if self.profile is None else self.profile.wrap(self.__target))(route_data)
 
             print("======================================= ended\n")
-            gc.collect()
 
-            return { "state": "success", "data": data }
+            return self.__success(data)
         except:
             return { "state": "fail", "message": traceback.format_exc() }
-        
+
+    def __success(self, data) -> dict:
+        res = { "state": "success", "data": data }
+        # Content-Type of response, Express decides if not set
+        if self.content_type is not None:
+            res["content_type"] = self.content_type
+
+        return res
+
     def to_dict(self) -> dict:
         return {
             "url": self.url,
-            "method": self.method
+            "method": self.method,
+            "admin": self.admin
         }
 
 class StaticRoute(Route):
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+import os, re, json, time, hashlib
+from collections import deque
+from types import MethodType
+from typing import List
+from threading import Lock
+try:
+    from typing import Literal
+except:
+    from typing_extensions import Literal
+
+
+# number of traces kept, older ones are dropped
+TRACE_BUFFER = 1000
+# pid of each side in chrome trace
+CHROME_PIDS = { "node-red": 1, "python": 2 }
+
+def record_span(send:MethodType, name:str, seconds:float):
+    """
+    Add span ended now to sampled request, `send` of request has `spans` only if sampled
+    """
+    spans = getattr(send, "spans", None)
+    if spans is not None:
+        end = time.time() * 1000
+        spans.append({ "name": name, "side": "python", "start": end - seconds * 1000, "end": end })
+
+# _msgid of Node-RED is hex of 8 bytes, used as trace id
+def _trace_id(key:str) -> str:
+    if re.fullmatch(r"[0-9a-f]{1,32}", key):
+        return key.zfill(32)
+
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+def _span_id() -> str:
+    return os.urandom(8).hex()
+
+class Tracer:
+    """
+    Collects spans of sampled messages through JS -> python -> JS
+
+    Node-RED side samples messages by `rate` and sends spans of each hop after result arrived
+        - node-red: encode(each send, with retries), decode(result), output(sending result to next nodes)
+        - python: bridge(Node-RED sent to python received), queue(waiting workers, batch), exec(function)
+        - node-red: bridge.out(python finished to result received)
+    traces are correlated by `_msgid` of message(or request id for routes)
+    """
+    def __init__(self, rate:float = 0.0, max_traces:int = TRACE_BUFFER):
+        """
+        Parameters
+        ----------
+        rate: float, default 0.0
+            ratio of messages to trace, 0.0 ~ 1.0
+        max_traces: int, default 1000
+            number of traces kept, older ones are dropped
+        """
+        if not 0.0 <= rate <= 1.0:
+            raise ValueError("`rate` must be between 0.0 and 1.0!")
+
+        self.rate = rate
+        self.__traces = deque(maxlen = max_traces)
+        self.__lock = Lock()
+
+    def add(self, trace:dict):
+        """
+        Add trace sent by Node-RED side
+
+        Parameters
+        ----------
+        trace: dict, required
+            { key, kind, name, start, end, spans: [ { name, side, start, end } ] }, times are epoch milliseconds
+        """
+        with self.__lock:
+            self.__traces.append(trace)
+
+    @property
+    def traces(self) -> List[dict]:
+        """
+        collected traces, oldest first
+        """
+        with self.__lock:
+            return list(self.__traces)
+
+    def clear(self):
+        """
+        Remove collected traces
+        """
+        with self.__lock:
+            self.__traces.clear()
+
+    def to_otel(self) -> dict:
+        """
+        Traces as OpenTelemetry(OTLP/JSON) resource spans, message is root span of its hops
+        """
+        spans = []
+        for trace in self.traces:
+            trace_id, root_id = _trace_id(trace["key"]), _span_id()
+            attributes = [
+                { "key": "noderedpy.kind", "value": { "stringValue": trace["kind"] } },
+                { "key": "noderedpy.msgid", "value": { "stringValue": trace["key"] } }
+            ]
+
+            spans.append({
+                "traceId": trace_id, "spanId": root_id, "name": f"{trace['kind']} {trace['name']}", "kind": 2,
+                "startTimeUnixNano": str(int(trace["start"] * 1e6)), "endTimeUnixNano": str(int(trace["end"] * 1e6)),
+                "attributes": attributes
+            })
+            for span in trace["spans"]:
+                spans.append({
+                    "traceId": trace_id, "spanId": _span_id(), "parentSpanId": root_id, "name": span["name"], "kind": 1,
+                    "startTimeUnixNano": str(int(span["start"] * 1e6)), "endTimeUnixNano": str(int(span["end"] * 1e6)),
+                    "attributes": attributes + [ { "key": "noderedpy.side", "value": { "stringValue": span["side"] } } ]
+                })
+
+        return {
+            "resourceSpans": [ {
+                "resource": { "attributes": [ { "key": "service.name", "value": { "stringValue": "nodered.py" } } ] },
+                "scopeSpans": [ { "scope": { "name": "noderedpy" }, "spans": spans } ]
+            } ]
+        }
+
+    def to_chrome(self) -> dict:
+        """
+        Traces as Chrome trace events(chrome://tracing, Perfetto), each message on own row
+        """
+        events = [
+            { "name": "process_name", "ph": "M", "pid": pid, "args": { "name": side } }
+            for side, pid in CHROME_PIDS.items()
+        ]
+        for tid, trace in enumerate(self.traces, 1):
+            args = { "kind": trace["kind"], "msgid": trace["key"] }
+            events.append({
+                "name": f"{trace['kind']} {trace['name']}", "cat": trace["kind"], "ph": "X", "pid": CHROME_PIDS["node-red"], "tid": tid,
+                "ts": trace["start"] * 1000, "dur": (trace["end"] - trace["start"]) * 1000, "args": args
+            })
+            for span in trace["spans"]:
+                events.append({
+                    "name": span["name"], "cat": trace["kind"], "ph": "X", "pid": CHROME_PIDS.get(span["side"], 0), "tid": tid,
+                    "ts": span["start"] * 1000, "dur": (span["end"] - span["start"]) * 1000, "args": args
+                })
+
+        return { "traceEvents": events, "displayTimeUnit": "ms" }
+
+    def export(self, file:os.PathLike, format:Literal["otel", "chrome"] = "otel"):
+        """
+        Write collected traces to json file
+
+        Parameters
+        ----------
+        file: PathLike, required
+            path of file to write
+        format: str, default otel
+            options: otel(OTLP/JSON, for OpenTelemetry collectors), chrome(chrome://tracing, Perfetto)
+        """
+        if not format in ( "otel", "chrome" ):
+            raise ValueError("`format` must be one of 'otel', 'chrome'!")
+
+        with open(file, "w", encoding = "utf-8") as fw:
+            json.dump(self.to_otel() if format == "otel" else self.to_chrome(), fw)
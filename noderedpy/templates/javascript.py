@@ -3,16 +3,9 @@ import os
 from typing import List
 
 
-def node_js(name:str, prop_names:List[str], cache_dir:os.PathLike):
+def node_js(name:str, prop_names:List[str], bridge_module:os.PathLike):
     return """
-const fs = require("fs"), path = require("path");
-
-let messageCache = {};
-
-function $sleep(ms) {
-    const wakeUpTime = Date.now() + ms;
-    while (Date.now() < wakeUpTime) {}
-}
+const bridge = require("{$bridge_module}");
 
 module.exports = function(RED) {
     function fnNode(config) {
@@ -20,7 +13,13 @@ module.exports = function(RED) {
         RED.nodes.createNode(this, config);
 
         this.status({ fill: "blue", shape: "dot", text: "Ready" });
-        this.on("input", (message) => {
+        this.on("input", (message, send, done) => {
+            // Node-RED 0.x has no send, done arguments
+            send = send || function() { node.send.apply(node, arguments); };
+            done = done || function(err) { if (err) { node.error(err, message); } };
+
+            // context(_msgid, req, res) of this message, restored when result of its correlation id arrives
+            const messageCache = {};
             messageCache._msgid = message._msgid;
             delete message._msgid;
 
@@ -82,100 +81,60 @@ module.exports = function(RED) {
 
             node.status({ fill: "green", shape: "dot", text: "Running" });
 
-            const inpFile = path.join("{$cache_dir}", "node_input.json");
-            const outFile = path.join("{$cache_dir}", "node_output.json");
-            const messageFile = path.join("{$cache_dir}", "node_message.json");
-
-            // remove if outFile exists before run
-            if (fs.existsSync(outFile)) {
-                fs.unlinkSync(outFile);
-            }
-
-            // send inputs to python
-            fs.writeFileSync(inpFile, JSON.stringify({
-                name: "{$name}",
+            // send inputs to python, result sent when python finished
+            bridge.request({
+                type: "node", name: "{$name}",
                 props: configToSend, msg: message
-            }, null, "    "));
-
-            // wait until job done
-            var resp = null;
-            while (true) {
-                if (fs.existsSync(messageFile)) {
-                    try {
-                        var resp_msg = JSON.parse(fs.readFileSync(messageFile));
-                        if (resp_msg.name == "{$name}") {
-                            fs.unlinkSync(messageFile);
-
-                            if (resp_msg.status != undefined) {
-                                node.status(resp_msg.status);
-                            }
-                            if (resp_msg.log != undefined) {
-                                node.log(resp_msg.log.join(" "));
-                            }
-                            if (resp_msg.warn != undefined) {
-                                node.warn(resp_msg.warn.join(" "));
-                            }
-                            if (resp_msg.error != undefined) {
-                                node.error(resp_msg.error.join(" "));
-                            }
-                        }
-                    }
-                    catch {
-                        continue;
-                    }
+            }, (resp_msg) => {
+                if (resp_msg.status != undefined) {
+                    node.status(resp_msg.status);
                 }
-
-                if (fs.existsSync(outFile)) {
-                    try {
-                        resp = JSON.parse(fs.readFileSync(outFile));
-                        if (resp.name == "{$name}") {
-                            fs.unlinkSync(outFile);
-                            break;
-                        }
-                    }
-                    catch {
-                        // $sleep(1000);
-                        continue;
-                    }
+                if (resp_msg.log != undefined) {
+                    node.log(resp_msg.log.join(" "));
                 }
-            }
-
-            // get result ans parse
-            try {
-                const state = resp.state;
-                delete resp.state;
+                if (resp_msg.warn != undefined) {
+                    node.warn(resp_msg.warn.join(" "));
+                }
+                if (resp_msg.error != undefined) {
+                    node.error(resp_msg.error.join(" "));
+                }
+            }, (resp) => {
+                // get result and parse
+                try {
+                    if (resp.state == "success") {
+                        var result = resp.msg;
+                        result._msgid = messageCache._msgid;
+                        if (messageCache.req != undefined) {
+                            result.req = messageCache.req;
+                        }
+                        if (messageCache.res != undefined) {
+                            result.res = messageCache.res;
+                        }
 
-                if (state == "success") {
-                    resp._msgid = messageCache._msgid;
-                    if (messageCache.req != undefined) {
-                        resp.req = messageCache.req;
+                        send(result);
+                        node.status({ fill: "green", shape: "dot", text: "Finished" });
+                        done();
                     }
-                    if (messageCache.res != undefined) {
-                        resp.res = messageCache.res;
+                    else {
+                        done(`
+${resp.message}`);
+                        console.log(`============================= error
+`);
+                        node.status({ fill: "red", shape: "dot", text: "Stopped, see debug panel" });
                     }
-
-                    node.send(resp);
-                    node.status({ fill: "green", shape: "dot", text: "Finished" });
                 }
-                else {
-                    node.error(`
-${resp.message}`);
+                catch (err) {
+                    done(`
+${err.message}`);
                     console.log(`============================= error
 `);
                     node.status({ fill: "red", shape: "dot", text: "Stopped, see debug panel" });
                 }
-            }
-            catch (err) {
-                node.error(`
-${err.message}`);
-                console.log(`============================= error
-`);
-                node.status({ fill: "red", shape: "dot", text: "Stopped, see debug panel" });
-            }
+            }, messageCache._msgid);
         });
     }
 
     RED.nodes.registerType("{$name}", fnNode);
 }
 """.replace("{$name}", name).replace("{$prop_names}", str(prop_names))\
-    .replace("{$cache_dir}", cache_dir.replace("\\", "\\\\"))
+    .replace("{$bridge_module}", bridge_module.replace("\\", "\\\\"))
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+run registered Nodes and routes in process, without Node-RED and node.js
+
+    from noderedpy.testing import Harness
+
+    with Harness() as harness:
+        result = harness.run("test", { "payload": 1 }, { "test_prop": "value" })
+        assert result.state == "success" and result.msg["payload"] == 1
+"""
+import copy, json, time, asyncio, traceback
+from dataclasses import dataclass, field
+from types import MethodType
+from typing import List, Any
+try:
+    from typing import Literal
+except:
+    from typing_extensions import Literal
+
+from .nodered.red import RED
+from .nodered.node.node import Node
+from .nodered.node.communicator import NodeCommunicator
+from .nodered.registry import Registry
+
+
+# generated javascript parses json object of props before sending
+def _as_sent(value:Any) -> Any:
+    if isinstance(value, str) and value.startswith("{") and value.endswith("}"):
+        return json.loads(value)
+
+    return value
+
+@dataclass
+class Result:
+    """
+    Class for return of Harness.run
+
+    Attributes
+    ----------
+    state: str
+        success or fail
+    msg: Any, default None
+        returned msg of Node function(data for route), None if failed
+    message: str, default ""
+        traceback if failed
+    logs: List[tuple], default []
+        arguments of `node.log` calls
+    warns: List[tuple], default []
+        arguments of `node.warn` calls
+    errors: List[tuple], default []
+        arguments of `node.error` calls
+    statuses: List[dict], default []
+        { fill, shape, text } of `node.status` calls
+    seconds: float, default 0.0
+        time to run function
+    """
+    state:Literal["success", "fail"]
+    msg:Any = None
+    message:str = ""
+    logs:List[tuple] = field(default_factory = list)
+    warns:List[tuple] = field(default_factory = list)
+    errors:List[tuple] = field(default_factory = list)
+    statuses:List[dict] = field(default_factory = list)
+    seconds:float = 0.0
+
+class Harness:
+    """
+    Runs Node functions and routes of registry directly on caller thread
+
+    props are mapped same as Node-RED side sends(defaults of widgets, then `props`, json objects parsed)
+    but `$msg`, `$global` references are not evaluated,
+    msg is copied as it goes through bridge, and messages of NodeCommunicator are captured in Result
+    (bridge, executors and banners are skipped, so only logic of functions is measured)
+    """
+    def __init__(self, registry:Registry = None):
+        """
+        Parameters
+        ----------
+        registry: Registry, default None
+            Nodes and routes to run, `RED.registry` if None
+        """
+        self.registry = RED.registry if registry is None else registry
+        # for `async def` functions
+        self.__loop:asyncio.AbstractEventLoop = None
+
+    def __get_node(self, name:str) -> Node:
+        node = self.registry.get_node(name)
+        if node is None:
+            raise ValueError(f"Node `{name}` is not registered!")
+
+        return node
+
+    def __call(self, func:MethodType, *args) -> Any:
+        result = func(*args)
+        if asyncio.iscoroutine(result):
+            if self.__loop is None:
+                self.__loop = asyncio.new_event_loop()
+
+            result = self.__loop.run_until_complete(result)
+
+        return result
+
+    # run function, messages of communicator go to results(log, warn, error only to first one, same as batch of bridge)
+    def __invoke(self, results:List[Result], name:str, func:MethodType, *args) -> Any:
+        def send(frame:dict):
+            for key, captured in ( ( "log", results[0].logs ), ( "warn", results[0].warns ), ( "error", results[0].errors ) ):
+                if key in frame:
+                    captured.append(tuple(frame[key]))
+
+            if "status" in frame:
+                for result in results:
+                    result.statuses.append(frame["status"])
+
+        started = time.perf_counter()
+        try:
+            return self.__call(func, NodeCommunicator(send, name), *args)
+        finally:
+            for result in results:
+                result.seconds = time.perf_counter() - started
+
+    def run(self, name:str, msg:dict = None, props:dict = None) -> Result:
+        """
+        Run Node function with one message
+
+        Parameters
+        ----------
+        name: str, required
+            name of registered Node
+        msg: dict, default None
+            input message, { "payload": None } if None
+        props: dict, default None
+            props by variable name(same as names of widgets), defaults of widgets are used for others
+
+        Return
+        ------
+        result: Result
+        """
+        return self.run_many(name, [ msg ], props)[0]
+
+    def run_many(self, name:str, msgs:List[dict], props:dict = None) -> List[Result]:
+        """
+        Run Node function with messages in order(in batches of `batch_size` for batch Node)
+        log, warn, error of batch are captured in result of first message of batch, status in all
+
+        Return
+        ------
+        results: List[Result]
+            result of each message
+        """
+        node = self.__get_node(name)
+        mapped = node.map_props({
+            key: _as_sent(value)
+            for key, value in dict(node.default_props, **(props or {})).items()
+        })
+
+        results = []
+        step = node.batch_size or 1
+        for idx in range(0, len(msgs), step):
+            chunk = [ { "payload": None } if msg is None else copy.deepcopy(msg) for msg in msgs[idx:idx + step] ]
+            chunk_results = [ Result("success") for _ in chunk ]
+
+            try:
+                if node.batch_size is None:
+                    outputs = [ self.__invoke(chunk_results, name, node.node_func, mapped, chunk[0]) ]
+                else:
+                    outputs = self.__invoke(chunk_results, name, node.node_func, [ ( mapped, msg ) for msg in chunk ])
+                    if not isinstance(outputs, list) or len(outputs) != len(chunk):
+                        raise ValueError(f"batch function must return list of {len(chunk)} messages!")
+
+                for result, output in zip(chunk_results, outputs):
+                    result.msg = output
+            except:
+                for result in chunk_results:
+                    result.state, result.msg, result.message = "fail", None, traceback.format_exc()
+
+            results.extend(chunk_results)
+
+        return results
+
+    def route(self, method:Literal["get", "post"], url:str, data:dict = None) -> Result:
+        """
+        Run route function, data is params(get) or body(post) of request
+
+        Return
+        ------
+        result: Result
+            returned data in `msg`
+        """
+        route = self.registry.get_route(method, url)
+        if route is None:
+            raise ValueError(f"route `{method} {url}` is not registered!")
+
+        result = Result("success")
+        started = time.perf_counter()
+        try:
+            result.msg = self.__call(route.target, copy.deepcopy(data or {}))
+        except:
+            result.state, result.message = "fail", traceback.format_exc()
+
+        result.seconds = time.perf_counter() - started
+        return result
+
+    def close(self):
+        """
+        Close event loop of `async def` functions
+        """
+        if self.__loop is not None:
+            self.__loop.close()
+            self.__loop = None
+
+    def __enter__(self) -> "Harness":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+# measure messages/second and p50/p99 latency of node and route bridge, across payload sizes and concurrency
+# runs against stand-in of Node-RED side(tests/bridge_standin.js), needs only node.js(no Node-RED, no network)
+# run: python tests/bridge_benchmark.py [--mode socket|file] [--codec json] [--output results.json] [--quick]
+import os, sys, json, time, platform, argparse, asyncio, tempfile, subprocess, contextlib
+from noderedpy import __version__
+from noderedpy.nodered.node.node import Node
+from noderedpy.nodered.route import Route
+from noderedpy.nodered.registry import Registry
+from noderedpy.nodered.dispatcher import Dispatcher
+from noderedpy.nodered.bridge import SocketBridge, FileBridge
+
+__dirname = os.path.dirname(os.path.realpath(__file__))
+SIZES, CONCURRENCIES = [ 64, 4 * 1024, 64 * 1024, 1024 * 1024 ], [ 1, 8, 64 ]
+QUICK_SIZES, QUICK_CONCURRENCIES = [ 64, 64 * 1024 ], [ 1, 16 ]
+
+
+def bench_echo(node, props:dict, msg:dict) -> dict:
+    return msg
+
+def route_echo(data:dict) -> dict:
+    return data
+
+def make_cases(quick:bool) -> list:
+    cases = []
+    for kind in ( "node", "route" ):
+        for size in QUICK_SIZES if quick else SIZES:
+            for concurrency in QUICK_CONCURRENCIES if quick else CONCURRENCIES:
+                # about 16MB of payloads per case
+                count = max(20, min(2000, (16 * 1024 * 1024) // size))
+                cases.append({ "kind": kind, "size": size, "concurrency": concurrency, "count": max(10, count // 10) if quick else count })
+
+    return cases
+
+async def run(mode:str, codec:str, cases:list, work_dir:str, concurrency:int) -> list:
+    registry = Registry()
+    node = Node("bench_echo", "benchmark", "1.0.0", "", "benchmark", [], "function.png", "#FDD0A2", [], bench_echo)
+    registry.add_node(node)
+    registry.add_route(Route("/bench_echo", "post", route_echo))
+
+    dispatcher = Dispatcher(registry, asyncio.get_running_loop(), concurrency, 256)
+    dispatcher.prepare_node(node)
+
+    bridge = (SocketBridge if mode == "socket" else FileBridge)(work_dir, dispatcher.handle, codec)
+    bridge.open()
+    serving = asyncio.get_running_loop().create_task(bridge.serve())
+
+    standin = await asyncio.create_subprocess_exec(
+        "node", os.path.join(__dirname, "bridge_standin.js"),
+        json.dumps({ "bridge": bridge.to_dict(), "warmup": 100, "cases": cases }),
+        stdout = subprocess.PIPE
+    )
+
+    results = []
+    async for line in standin.stdout:
+        results.append(json.loads(line))
+        sys.__stdout__.write(format_result(results[-1]) + "\n")
+
+    await standin.wait()
+    bridge.close()
+    await serving
+
+    if standin.returncode != 0:
+        raise RuntimeError(f"stand-in exited with code {standin.returncode}")
+
+    return results
+
+def format_result(result:dict) -> str:
+    return f"{result['kind']:<6} {result['size']:>8} bytes x{result['concurrency']:<3} {result['rate']:>10.1f} msg/s  p50 {result['p50_ms']:>8.3f} ms  p99 {result['p99_ms']:>8.3f} ms  failed {result['failed']}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "benchmark of nodered.py bridge")
+    parser.add_argument("--mode", choices = [ "socket", "file" ], default = "socket")
+    parser.add_argument("--codec", default = "json")
+    parser.add_argument("--concurrency", type = int, default = min(32, (os.cpu_count() or 1) + 4))
+    parser.add_argument("--output", default = None, help = "json file to write results")
+    parser.add_argument("--quick", action = "store_true", help = "fewer cases and messages")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        # banners of Node functions and routes are not measured
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            results = asyncio.run(run(args.mode, args.codec, make_cases(args.quick), work_dir, args.concurrency))
+
+    report = {
+        "noderedpy": __version__,
+        "python": platform.python_version(),
+        "node": subprocess.run([ "node", "--version" ], capture_output = True, encoding = "utf-8").stdout.strip(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "mode": args.mode, "codec": args.codec, "concurrency": args.concurrency,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "results": results
+    }
+    if args.output is not None:
+        with open(args.output, "w", encoding = "utf-8") as fw:
+            json.dump(report, fw, indent = 4)
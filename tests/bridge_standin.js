@@ -0,0 +1,70 @@
+// stand-in of Node-RED side for tests/bridge_benchmark.py
+// sends requests through real bridge.js(no Node-RED, no npm packages for json codec) and prints result of each case as json line
+// run by benchmark: node tests/bridge_standin.js '{ "bridge": {...}, "warmup": 100, "cases": [ { kind, size, concurrency, count } ] }'
+const bridge = require("../noderedpy/node-red-starter/bridge.js");
+
+const configs = JSON.parse(process.argv[2]);
+bridge.configure(configs.bridge);
+
+function makeRequest(kind, payload) {
+    if (kind == "node") {
+        return { type: "node", name: "bench_echo", props: {}, msg: { _msgid: "bench", payload: payload } };
+    }
+
+    return { type: "route", method: "post", url: "/bench_echo", data: { payload: payload } };
+}
+
+function percentile(sorted, ratio) {
+    return sorted[Math.min(sorted.length - 1, Math.floor(sorted.length * ratio))];
+}
+
+// keep `concurrency` requests in flight until `count` finished
+function runCase(info) {
+    return new Promise((resolve) => {
+        const payload = "x".repeat(info.size), latencies = [];
+        var sent = 0, finished = 0, failed = 0;
+        const start = performance.now();
+
+        function next() {
+            const requestStart = performance.now();
+            sent++;
+            bridge.request(makeRequest(info.kind, payload), null, (resp) => {
+                latencies.push(performance.now() - requestStart);
+                if (resp.state != "success") {
+                    failed++;
+                }
+
+                if (++finished == info.count) {
+                    const seconds = (performance.now() - start) / 1000;
+                    latencies.sort((a, b) => a - b);
+                    resolve(Object.assign({}, info, {
+                        seconds: seconds, rate: info.count / seconds, failed: failed,
+                        p50_ms: percentile(latencies, 0.5), p99_ms: percentile(latencies, 0.99), max_ms: latencies[latencies.length - 1]
+                    }));
+                }
+                else if (sent < info.count) {
+                    next();
+                }
+            });
+        }
+
+        for (var idx = 0; idx < Math.min(info.concurrency, info.count); idx++) {
+            next();
+        }
+    });
+}
+
+async function main() {
+    // connect, start workers of python
+    for (var kind of [ "node", "route" ]) {
+        await runCase({ kind: kind, size: 64, concurrency: 8, count: configs.warmup });
+    }
+
+    for (var info of configs.cases) {
+        process.stdout.write(JSON.stringify(await runCase(info)) + "\n");
+    }
+
+    process.exit(0);
+}
+
+main();
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+# measure cost of bridge codecs per frame(encode + decode)
+# run: python tests/codec_benchmark.py
+import time
+from noderedpy.nodered.bridge.codec import CODECS, get_codec, encode_frame, decode_frame
+
+
+def make_frame(size:int, binary:bool = False) -> dict:
+    payload = bytes(size) if binary else {
+        "items": [
+            { "index": idx, "name": f"item-{idx}", "value": idx * 0.5, "enabled": idx % 2 == 0 }
+            for idx in range(max(1, size // 64))
+        ]
+    }
+
+    return {
+        "type": "node", "id": "benchmark-1", "name": "benchmark",
+        "props": { "prop": "value" },
+        "msg": { "_msgid": "benchmark", "topic": "benchmark", "payload": payload }
+    }
+
+def measure(codec, frame:dict, count:int) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        decode_frame(b"".join(encode_frame(frame, codec)), codec)
+
+    return (time.perf_counter() - start) / count
+
+
+if __name__ == "__main__":
+    cases = [
+        ( "small", make_frame(64), 20000 ),
+        ( "64KB", make_frame(64 * 1024), 200 ),
+        ( "1MB", make_frame(1024 * 1024), 10 ),
+        ( "1MB binary", make_frame(1024 * 1024, True), 200 )
+    ]
+
+    for name in CODECS:
+        try:
+            codec = get_codec(name)
+        except ImportError as e:
+            print(f"{name}: skipped({e})")
+            continue
+
+        for case, frame, count in cases:
+            size = len(b"".join(encode_frame(frame, codec)))
+            print(f"{name:<8} {case:<12} {size:>10} bytes {measure(codec, frame, count) * 1e6:>12.1f} us/frame")
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+# run with `python tests/harness_test.py`(or pytest), needs no Node-RED or node.js
+from noderedpy import Node, Input
+from noderedpy.decorator import register, route
+from noderedpy.testing import Harness
+
+
+@register("harness-double", widgets = [
+    Input("factor", "2")
+])
+def double(node:Node, props:dict, msg:dict) -> dict:
+    if not isinstance(msg["payload"], int):
+        raise TypeError("payload must be int!")
+
+    node.log("doubling", msg["payload"])
+    node.status("green", "dot", "done")
+
+    msg["payload"] *= int(props["factor"])
+    return msg
+
+@register("harness-sum", batch_size = 4)
+def batch_sum(node:Node, batch:list) -> list:
+    node.log("batch", len(batch))
+    return [ dict(msg, payload = msg["payload"] + 1) for props, msg in batch ]
+
+@register("harness-async")
+async def async_echo(node:Node, props:dict, msg:dict) -> dict:
+    return dict(msg, echoed = True)
+
+@route("/harness-test", "get")
+def get_item(data:dict) -> dict:
+    return { "id": int(data["id"]) }
+
+
+def test_success():
+    with Harness() as harness:
+        result = harness.run("harness-double", { "payload": 21 })
+        assert result.state == "success", result.message
+        assert result.msg == { "payload": 42 }
+        assert result.logs == [ ( "doubling", 21 ) ]
+        assert len(result.statuses) == 1
+
+        # props override defaults of widgets
+        assert harness.run("harness-double", { "payload": 2 }, { "factor": "5" }).msg["payload"] == 10
+
+def test_fail():
+    with Harness() as harness:
+        result = harness.run("harness-double", { "payload": "text" })
+        assert result.state == "fail"
+        assert result.msg is None
+        assert "payload must be int!" in result.message
+
+        # failed message does not affect next one
+        assert harness.run("harness-double", { "payload": 1 }).state == "success"
+
+def test_batch():
+    with Harness() as harness:
+        results = harness.run_many("harness-sum", [ { "payload": idx } for idx in range(6) ])
+        assert [ result.msg["payload"] for result in results ] == [ 1, 2, 3, 4, 5, 6 ]
+        # log of batch only in first result of batch
+        assert [ len(result.logs) for result in results ] == [ 1, 0, 0, 0, 1, 0 ]
+
+def test_async():
+    with Harness() as harness:
+        assert harness.run("harness-async", { "payload": 1 }).msg == { "payload": 1, "echoed": True }
+
+def test_route():
+    with Harness() as harness:
+        assert harness.route("get", "/harness-test", { "id": "3" }).msg == { "id": 3 }
+
+        result = harness.route("get", "/harness-test", {})
+        assert result.state == "fail" and "KeyError" in result.message
+
+
+if __name__ == "__main__":
+    for test in ( test_success, test_fail, test_batch, test_async, test_route ):
+        test()
+        print(f"{test.__name__} passed")
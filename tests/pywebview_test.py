@@ -56,8 +56,11 @@ if __name__ == "__main__":
         Auth(username = "node-red-py", password = "p@ssword")
     )
 
+    # serve in background, returns after Node-RED started
+    handle = red.start(start_browser = False, block = False)
+
     webview.initialize()
-    win = webview.create_window("Node-RED.py pywebview")
-    win.events.closing += lambda: red.stop()
+    win = webview.create_window("Node-RED.py pywebview", f"http://127.0.0.1:{red.port}{red.admin_root}")
+    win.events.closing += lambda: handle.stop()
 
-    webview.start(lambda: red.start(callback = lambda: win.load_url(f"http://127.0.0.1:{red.port}{red.admin_root}"), start_browser = False), debug = True)
+    webview.start(debug = True)